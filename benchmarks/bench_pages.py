@@ -0,0 +1,323 @@
+"""Headless benchmark of the app pages.
+
+Each page is driven with Streamlit's AppTest through a scripted sequence of
+widget interactions, on synthetic datasets generated from final_data.csv.
+For every rerun it records the wall time, the peak resident memory during
+the rerun and the total size of the plotly figures sent to the browser. It
+then opens more sessions on the warm caches and records the memory each one
+adds, which must stay under --session-budget. The scenarios run without the
+startup prewarm; a separate worker measures the prewarm and the first render
+that follows it.
+
+    python benchmarks/bench_pages.py --save benchmarks/baseline.json
+    python benchmarks/bench_pages.py --compare benchmarks/baseline.json
+
+--compare exits with status 1 if a rerun got slower or heavier than the
+baseline by more than --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dataset  # noqa: E402
+
+APP = os.path.join(ROOT, "main_page.py")
+SIZES = [4402, 35000, 350000]
+# Towns the pages select by default, kept unchanged in every synthetic dataset
+KEPT_TOWNS = ["Paris", "Grenoble", "Marseille", "Lyon"]
+
+
+######################
+# Synthetic datasets
+######################
+
+def synthetic_dataset(rows, seed=0):
+    """Dataset with the schema of final_data.csv: the real towns, then jittered copies of them."""
+    source = dataset.read_csv(os.path.join(ROOT, "datasets", "final_data.csv"))
+    if rows <= len(source):
+        kept = source["Town"].isin(KEPT_TOWNS).to_numpy()
+        return pd.concat([source[kept], source[~kept].iloc[:rows - kept.sum()]], ignore_index=True)
+
+    rng = np.random.default_rng(seed)
+    copies = source.iloc[rng.integers(0, len(source), rows - len(source))].reset_index(drop=True)
+    n = len(copies)
+    copies["CODGEO"] = np.arange(100000, 100000 + n, dtype="int32")
+    copies["Town"] = copies["Town"].astype(str) + " " + (np.arange(n) + 2).astype(str)
+    copies["latitude"] += rng.normal(0, 0.05, n)
+    copies["longitude"] += rng.normal(0, 0.05, n)
+    for column in copies.columns:
+        if dataset.column_dtype(column) == "float32":
+            copies[column] = (copies[column] * rng.normal(1, 0.05, n)).round(1).astype("float32")
+        elif column == "total_population" or column.endswith("_firms"):
+            copies[column] = (copies[column] * rng.uniform(0.5, 1.5, n)).round().astype("int32")
+    return pd.concat([source, copies], ignore_index=True)
+
+
+def write_dataset(rows, directory):
+    """Writes the synthetic CSV (and its column store) and returns the CSV path."""
+    path = os.path.join(directory, f"final_data_{rows}.csv")
+    synthetic_dataset(rows).to_csv(path, encoding="utf-8")
+    dataset.build_store(path, os.path.splitext(path)[0] + "_columns")
+    return path
+
+
+######################
+# Scenarios
+######################
+
+def widget(at, kind, label):
+    """The widget of the given kind whose label starts with label."""
+    for element in getattr(at, kind):
+        if element.label.startswith(label):
+            return element
+    raise LookupError(f"No {kind} labelled {label!r}")
+
+
+def goto(page):
+    return lambda at: at.sidebar.radio[0].set_value(page)
+
+
+# (page, [(step, action)]); the first step of each page opens it
+SCENARIOS = [
+    ("Map overview", [
+        ("open", goto("Map overview")),
+        ("salary slider", lambda at: widget(at, "slider", "Select mean salary range").set_value((12.0, 15.0))),
+        ("min population", lambda at: widget(at, "number_input", "Minimum Population").set_value(5000)),
+        ("salary outliers", lambda at: widget(at, "checkbox", "Show outliers for Mean Salary").set_value(False)),
+        ("population log", lambda at: widget(at, "checkbox", "Log scale for population").set_value(False)),
+        ("clusters", lambda at: widget(at, "selectbox", "Map detail").set_value("Town clusters")),
+        ("region zoom", lambda at: widget(at, "selectbox", "Zoom on region").set_value("Bretagne")),
+    ]),
+    ("Understanding Salary Inequalities", [
+        ("open", goto("Understanding Salary Inequalities")),
+        ("region", lambda at: widget(at, "selectbox", "Select Region Name").set_value("Bretagne")),
+        ("departement", lambda at: widget(at, "selectbox", "Select Departement").set_value(" (29) Finistère")),
+        ("category", lambda at: widget(at, "selectbox", "Select Category").set_value("executive")),
+        ("boxes", lambda at: widget(at, "checkbox", "Show box plot on top of violin plot").set_value(False)),
+        ("age region", lambda at: widget(at, "selectbox", "Select Region Name :").set_value("Île-de-France")),
+    ]),
+    ("Comparision of up to 3 cities", [
+        ("open", goto("Comparision of up to 3 cities")),
+        ("age", lambda at: widget(at, "selectbox", "Select segmentation").set_value("Age")),
+        ("gender", lambda at: widget(at, "selectbox", "Select segmentation").set_value("Gender")),
+        ("search town", lambda at: widget(at, "text_input", "Search Third Town").set_value("Lyon")),
+        ("cohort mode", lambda at: widget(at, "radio", "Comparison mode").set_value("Cohort of towns")),
+        ("add departement", lambda at: widget(at, "button", "Add every town of the departement").click()),
+        ("commuting area", lambda at: widget(at, "radio", "Comparison mode").set_value("Commuting area")),
+        ("area radius", lambda at: widget(at, "slider", "Radius of the commuting area").set_value(40)),
+    ]),
+    ("Inequality rankings", [
+        ("open", goto("Inequality rankings")),
+        ("departements", lambda at: widget(at, "radio", "Rank").set_value("Departement")),
+        ("gender gap", lambda at: widget(at, "selectbox", "Rank by").set_value("gender_gap")),
+        ("region", lambda at: widget(at, "selectbox", "Region of the departements").set_value("Bretagne")),
+    ]),
+    ("Definitions and Methodology", [
+        ("open", goto("Definitions and Methodology")),
+    ]),
+]
+
+
+def figure_bytes(at):
+    """Total size of the plotly figures of the last run."""
+    return sum(len(chart.proto.spec) for chart in at.get("plotly_chart"))
+
+
+def rss_mb():
+    """Current resident memory (Linux), the peak elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def reset_peak_rss():
+    """Starts a new resident memory peak (Linux): peak_rss_mb() then reports the peak since this call."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Peak resident memory since reset_peak_rss() on Linux, since the process started elsewhere."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 2 ** 10, 1)
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def run_scenarios(rows):
+    """Runs every scenario in this process and returns one result per rerun."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+    results = []
+
+    def record(page, step, action, at):
+        # The peak of this rerun only, so that a regression is blamed on the step that caused it
+        reset_peak_rss()
+        start = time.perf_counter()
+        (action(at) if action else at).run()
+        seconds = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{page} / {step}: {at.exception[0].value}")
+        results.append({"rows": rows, "page": page, "step": step, "seconds": round(seconds, 4), "figure_bytes": figure_bytes(at), "peak_rss_mb": peak_rss_mb()})
+
+    at = AppTest.from_file(APP, default_timeout=600)
+    # First run of a fresh worker: data load and every cache
+    record("startup", "cold start", None, at)
+    for page, steps in SCENARIOS:
+        for step, action in steps:
+            record(page, step, action, at)
+
+    # More sessions on the warm caches: the dataset and the caches are shared,
+    # so each one should only add its own session state and widgets
+    gc.collect()
+    before = rss_mb()
+    reset_peak_rss()
+    start = time.perf_counter()
+    sessions = [AppTest.from_file(APP, default_timeout=600).run() for _ in range(SESSIONS)]
+    seconds = time.perf_counter() - start
+    gc.collect()
+    results.append({"rows": rows, "page": "sessions", "step": f"{SESSIONS} sessions", "seconds": round(seconds, 4), "figure_bytes": figure_bytes(sessions[-1]), "peak_rss_mb": peak_rss_mb(), "session_mb": round((rss_mb() - before) / SESSIONS, 2)})
+    return results
+
+
+def run_prewarmed(rows):
+    """Prewarm time, then the first render of a worker whose caches were filled by it."""
+    from streamlit.testing.v1 import AppTest
+
+    import startup
+
+    os.chdir(ROOT)
+    reset_peak_rss()
+    start = time.perf_counter()
+    startup.prewarm().join()
+    prewarm_seconds = time.perf_counter() - start
+    prewarm_peak = peak_rss_mb()
+
+    at = AppTest.from_file(APP, default_timeout=600)
+    reset_peak_rss()
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"first render: {at.exception[0].value}")
+    return [
+        {"rows": rows, "page": "startup", "step": "prewarm", "seconds": round(prewarm_seconds, 4), "figure_bytes": 0, "peak_rss_mb": prewarm_peak},
+        {"rows": rows, "page": "startup", "step": "prewarmed start", "seconds": round(seconds, 4), "figure_bytes": figure_bytes(at), "peak_rss_mb": peak_rss_mb()},
+    ]
+
+
+######################
+# Baselines
+######################
+
+# Sessions opened after the scenarios to measure the memory of one session
+SESSIONS = 8
+
+# Smallest increase reported as a regression for each metric, below that it is noise
+MIN_INCREASE = {"seconds": 0.1, "figure_bytes": 1024, "peak_rss_mb": 20, "session_mb": 1}
+
+
+def compare(results, baseline, tolerance):
+    """Reruns slower or heavier than the baseline by more than tolerance."""
+    reference = {(r["rows"], r["page"], r["step"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = reference.get((result["rows"], result["page"], result["step"]))
+        if before is None:
+            continue
+        for metric, min_increase in MIN_INCREASE.items():
+            if metric not in result or metric not in before:
+                continue
+            increase = result[metric] - before[metric]
+            if increase > before[metric] * tolerance and increase > min_increase:
+                regressions.append(dict(result, metric=metric, baseline=before[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="numbers of towns of the synthetic datasets")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative increase over the baseline")
+    parser.add_argument("--session-budget", type=float, default=5, help="memory allowed per session on warm caches, in MB")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--prewarmed-worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child processes: DV_DATA_PATH is set, print the results as JSON
+    if args.worker:
+        print(json.dumps(run_scenarios(int(args.worker))))
+        return
+    if args.prewarmed_worker:
+        print(json.dumps(run_prewarmed(int(args.prewarmed_worker))))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            path = write_dataset(rows, directory)
+            # One process per dataset so that no cache or memory peak is shared
+            for worker, prewarm in [("--prewarmed-worker", "1"), ("--worker", "0")]:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), worker, str(rows)],
+                    env=dict(os.environ, DV_DATA_PATH=path, DV_PREWARM=prewarm),
+                    capture_output=True, text=True, check=True,
+                ).stdout
+                results += json.loads(output.strip().splitlines()[-1])
+
+    for r in results:
+        print(f"{r['rows']:>7} {r['page'][:34]:<34} {r['step']:<16} {r['seconds']:>8.3f}s {r['figure_bytes'] / 1024:>9.1f} KB {r['peak_rss_mb']:>8.1f} MB")
+    over_budget = [r for r in results if r.get("session_mb", 0) > args.session_budget]
+    for r in results:
+        if "session_mb" in r:
+            print(f"{r['rows']:>7} {r['session_mb']:.2f} MB per session")
+    for r in over_budget:
+        print(f"OVER BUDGET {r['rows']}: {r['session_mb']} MB per session > {args.session_budget} MB")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['rows']} {r['page']} / {r['step']}: {r['metric']} {r['baseline']} -> {r[r['metric']]}")
+    sys.exit(1 if regressions or over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from reshape import AGES, CATEGORIES, GENDERS
+
+######################
+# Aggregation cube
+#
+# Every salary column of the dataset is one cell of
+# socio-professional category x gender x age group ("All" where the column
+# does not split on a dimension, e.g. mean_female_salary is
+# (All, female, All)). The cube stores, for every
+# region x departement x cell, the number of towns, the mean, the
+# population-weighted mean and the quartiles of the town salaries, with
+# "All" rows for the whole region / the whole country. Each geographic level
+# is one sort of the (town, cell) values by cell and value, the statistics
+# being sums and ranks over the runs of each cell, so the pages only do
+# dictionary lookups and slices afterwards.
+######################
+
+ALL = "All"
+
+# (column, category, gender, age) of every salary column
+CELLS = (
+    [("mean_salary", ALL, ALL, ALL)]
+    + [(f"mean_{category}_salary", category, ALL, ALL) for category in CATEGORIES]
+    + [(f"mean_{gender}_salary", ALL, gender, ALL) for gender in GENDERS]
+    + [(f"mean_{gender}_{category}_salary", category, gender, ALL) for gender in GENDERS for category in CATEGORIES]
+    + [(f"mean_{age}_age_salary", ALL, ALL, age) for age in AGES]
+    + [(f"mean_{age}_{gender}_salary", ALL, gender, age) for age in AGES for gender in GENDERS]
+)
+
+STATISTICS = ["count", "mean", "weighted_mean", "q1", "median", "q3"]
+
+
+class AggregationCube:
+    """Salary statistics for every region x departement x category x gender x age cell."""
+
+    def __init__(self, data):
+        n_towns = len(data)
+        n_cells = len(CELLS)
+        regions = data["nom_région"].astype(str).to_numpy()
+        departements = data["Departement"].astype(str).to_numpy()
+        all_column = np.full(n_towns, ALL, dtype=object)
+
+        # One value per (town, cell), at index town * n_cells + cell; the
+        # geographic levels below only keep sorted indexes into this array
+        self.values = data[[cell[0] for cell in CELLS]].to_numpy(dtype="float32").reshape(-1)
+        index_dtype = "int32" if len(self.values) < 2 ** 31 else "int64"
+        valid = np.flatnonzero(~np.isnan(self.values)).astype(index_dtype)
+        # Sorted by value once; a stable sort by cell then keeps the values of each cell in order
+        by_value = valid[np.argsort(self.values[valid], kind="stable")]
+        population = data["total_population"].to_numpy(dtype="float64")
+        self.n_cells = n_cells
+
+        self.cells = {}
+        # cell key -> (level, start, stop) of its values in self.sorted[level]
+        self.positions = {}
+        self.sorted = []
+        # Geographic levels of each town: its departement, its whole region,
+        # its departement whatever the region, and the whole country
+        for level, (level_regions, level_departements) in enumerate([(regions, departements), (regions, all_column), (all_column, departements), (all_column, all_column)]):
+            geo_codes, geo_labels = pd.MultiIndex.from_arrays([level_regions, level_departements]).factorize()
+            keys = geo_codes[by_value // n_cells] * n_cells + by_value % n_cells
+            # Values sorted by cell, then by value, for the quantiles
+            order = np.argsort(keys, kind="stable")
+            keys = keys[order]
+            self.sorted.append(by_value[order])
+            values = self.values[self.sorted[level]].astype("float64")
+            weights = population[self.sorted[level] // n_cells]
+
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            stops = np.r_[starts[1:], len(keys)]
+            counts = stops - starts
+            table = pd.DataFrame({
+                "count": counts,
+                "mean": np.add.reduceat(values, starts) / counts,
+                "weighted_mean": np.add.reduceat(values * weights, starts) / np.add.reduceat(weights, starts),
+            })
+            # Linear interpolation between the closest ranks, as pandas' quantile
+            for statistic, q in [("q1", 0.25), ("median", 0.5), ("q3", 0.75)]:
+                rank = (counts - 1) * q
+                low = np.floor(rank).astype("int64")
+                high = np.minimum(low + 1, counts - 1)
+                table[statistic] = values[starts + low] + (rank - low) * (values[starts + high] - values[starts + low])
+
+            for key, start, stop, record in zip(keys[starts].tolist(), starts.tolist(), stops.tolist(), table[STATISTICS].to_dict("records")):
+                region, departement = geo_labels[key // n_cells]
+                _, category, gender, age = CELLS[key % n_cells]
+                cell_key = (region, departement, category, gender, age)
+                self.cells[cell_key] = record
+                self.positions[cell_key] = (level, start, stop)
+
+        # Dropdown options, in order of appearance in the dataset
+        self.regions = list(dict.fromkeys(regions))
+        self.departements_by_region = {ALL: list(dict.fromkeys(departements))}
+        for region, departement in dict.fromkeys(zip(regions, departements)):
+            self.departements_by_region.setdefault(region, []).append(departement)
+
+    def get(self, region=ALL, departement=ALL, category=ALL, gender=ALL, age=ALL):
+        """Statistics of one cell, or None if no town has a value for it."""
+        return self.cells.get((region, departement, category, gender, age))
+
+    def cell_values(self, region=ALL, departement=ALL, category=ALL, gender=ALL, age=ALL):
+        """Salaries of the towns in one cell and the dataset positions of those towns."""
+        position = self.positions.get((region, departement, category, gender, age))
+        if position is None:
+            return np.empty(0, dtype="float32"), np.empty(0, dtype="int32")
+        level, start, stop = position
+        indexes = self.sorted[level][start:stop]
+        return self.values[indexes], indexes // self.n_cells
+
+    def departements(self, region=ALL):
+        """Departements of a region (every departement for "All")."""
+        return self.departements_by_region.get(region, [])
+
+    def table(self, segment, labels, region=ALL, departement=ALL, **fixed):
+        """Statistics of each label of one segment ("category", "gender" or "age"), the other segments being fixed."""
+        rows = []
+        for label in labels:
+            record = self.get(region, departement, **dict(fixed, **{segment: label}))
+            if record is not None:
+                rows.append(dict(record, **{segment.capitalize(): label}))
+        return pd.DataFrame(rows, columns=[segment.capitalize()] + STATISTICS)
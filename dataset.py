@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+######################
+# Typed columnar copy of final_data.csv
+#
+# Build it once with:
+#   python dataset.py
+# It writes one .npy file per column in datasets/final_data_columns/ plus a
+# schema.json. load_dataset() memory-maps those files instead of parsing the CSV.
+# A build never rewrites a file in place: it writes new files, then replaces
+# the schema, so a running app keeps reading the files it mapped. The schema
+# records the CSV it was built from; the store is only used for that CSV.
+# file_stats() and fingerprint() tell when the files changed (see reload.py).
+#
+# The loaded dataset is shared by every session: its columns are read-only,
+# so an in-place write raises instead of changing the data of other users.
+######################
+
+# DV_DATA_PATH points the app to another CSV (e.g. the synthetic benchmark datasets)
+CSV_PATH = os.environ.get("DV_DATA_PATH", "./datasets/final_data.csv")
+STORE_PATH = os.path.splitext(CSV_PATH)[0] + "_columns"
+SCHEMA_FILE = "schema.json"
+
+# Region and departement names are stored as integer codes + a category list.
+CATEGORY_COLUMNS = ["nom_région", "Departement"]
+# Town names are stored as codes too but decoded back to plain strings on load.
+STRING_COLUMNS = ["Town"]
+INT_COLUMNS = ["CODGEO", "total_firms", "total_population", "Micro_firms", "Small_firms", "Medium_firms", "Large_firms"]
+# Coordinates keep float64 so the map positions do not move.
+FLOAT64_COLUMNS = ["latitude", "longitude"]
+
+
+def column_dtype(column):
+    """Returns the storage dtype of a column of final_data.csv."""
+    if column in CATEGORY_COLUMNS or column in STRING_COLUMNS:
+        return "category"
+    if column in INT_COLUMNS:
+        return "int32"
+    if column in FLOAT64_COLUMNS:
+        return "float64"
+    # Every other column is a mean net salary per hour
+    return "float32"
+
+
+def read_csv(path=CSV_PATH):
+    """Parses the CSV with the typed schema (the unnamed index column is dropped)."""
+    header = pd.read_csv(path, encoding="utf-8", index_col=0, nrows=0).columns
+    return pd.read_csv(path, encoding="utf-8", index_col=0, dtype={c: column_dtype(c) for c in header}).reset_index(drop=True)
+
+
+def read_schema(store_path=STORE_PATH):
+    """The schema of the column store, None if it was not built."""
+    try:
+        with open(os.path.join(store_path, SCHEMA_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def build_store(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """Converts the CSV into the column store and returns the schema written."""
+    # Taken before reading: a CSV changed meanwhile does not match the store
+    stat = os.stat(csv_path)
+    source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_hash(csv_path)}
+    df = read_csv(csv_path)
+    os.makedirs(store_path, exist_ok=True)
+    previous = read_schema(store_path)
+
+    # New file names for each build: the files of the previous one may be memory-mapped
+    build = uuid.uuid4().hex[:8]
+    schema = {"rows": len(df), "source": source, "columns": []}
+    for i, column in enumerate(df.columns):
+        filename = f"{i:02d}-{build}.npy"
+        entry = {"name": column, "file": filename, "dtype": column_dtype(column)}
+        if entry["dtype"] == "category":
+            values = df[column].cat.codes.to_numpy().astype("int32")
+            entry["categories"] = df[column].cat.categories.tolist()
+            entry["decode"] = "string" if column in STRING_COLUMNS else "category"
+        else:
+            values = df[column].to_numpy()
+        np.save(os.path.join(store_path, filename), values)
+        schema["columns"].append(entry)
+
+    # Replaced last, in one step, so a half-built store is never picked up
+    temporary = os.path.join(store_path, f"{SCHEMA_FILE}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False, indent=1)
+    os.replace(temporary, os.path.join(store_path, SCHEMA_FILE))
+
+    # The files of the previous build are kept for readers that opened its schema just before
+    kept = {entry["file"] for built in (schema, previous) if built for entry in built["columns"]}
+    for name in os.listdir(store_path):
+        if name.endswith(".npy") and name not in kept:
+            try:
+                # A memory-mapped file stays readable by the processes using it
+                os.remove(os.path.join(store_path, name))
+            except OSError:
+                pass
+    return schema
+
+
+def store_is_fresh(csv_path=CSV_PATH, store_path=STORE_PATH, schema=None):
+    """True if the column store exists and was built from the current CSV (or there is no CSV)."""
+    schema = schema or read_schema(store_path)
+    if schema is None:
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    source = schema.get("source")
+    if source is None:
+        return False
+    stat = os.stat(csv_path)
+    if (stat.st_size, stat.st_mtime_ns) == (source["size"], source["mtime_ns"]):
+        return True
+    # Same content with another modification time (copied, checked out again)
+    return stat.st_size == source["size"] and file_hash(csv_path) == source["sha256"]
+
+
+def read_store(store_path=STORE_PATH, schema=None):
+    """Loads the column store, memory-mapping the numeric columns."""
+    schema = schema or read_schema(store_path)
+
+    columns = {}
+    for entry in schema["columns"]:
+        values = np.load(os.path.join(store_path, entry["file"]), mmap_mode="r")
+        if entry["dtype"] == "category":
+            categories = np.array(entry["categories"], dtype=object)
+            if entry["decode"] == "string":
+                columns[entry["name"]] = categories[values]
+            else:
+                columns[entry["name"]] = pd.Categorical.from_codes(values, categories=categories)
+        else:
+            columns[entry["name"]] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file, read by blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_stats(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """Size and modification time of the CSV and of the store schema (None if missing): cheap to poll."""
+    stats = []
+    for path in (csv_path, os.path.join(store_path, SCHEMA_FILE)):
+        try:
+            stat = os.stat(path)
+            stats.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            stats.append(None)
+    return tuple(stats)
+
+
+def store_version(schema, store_path=STORE_PATH):
+    """Version of the data of a store: the hash of the CSV it was built from."""
+    if "source" in schema:
+        return schema["source"]["sha256"][:16]
+    # Stores built before the schema recorded its CSV
+    return file_hash(os.path.join(store_path, SCHEMA_FILE))[:16]
+
+
+def fingerprint(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """Short content hash of the CSV, or version of the store when there is no CSV (None if neither exists)."""
+    if os.path.exists(csv_path):
+        return file_hash(csv_path)[:16]
+    schema = read_schema(store_path)
+    return None if schema is None else store_version(schema, store_path)
+
+
+def read_only(values):
+    """Read-only view of a numpy array."""
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+def freeze(df):
+    """The same columns (no copy of the values) backed by read-only arrays.
+
+    Numeric columns and the codes of categorical columns become read-only
+    views. String columns are held as read-only object arrays, since
+    pandas' string arrays replace their values in place on assignment.
+    """
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            columns[column] = pd.Categorical.from_codes(read_only(series.cat.codes.to_numpy()), dtype=series.dtype, validate=False)
+        elif series.dtype.kind in "biuf":
+            columns[column] = read_only(series.to_numpy())
+        else:
+            columns[column] = pd.Series(read_only(series.to_numpy(dtype=object)), dtype=object, copy=False)
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_dataset(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """Reads the column store when it is up to date, the CSV otherwise, as a read-only frame."""
+    return load_version(csv_path, store_path)[1]
+
+
+def load_version(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """load_dataset() with the version of what it read: the short content hash of the CSV the data comes from."""
+    schema = read_schema(store_path)
+    if store_is_fresh(csv_path, store_path, schema):
+        return store_version(schema, store_path), freeze(read_store(store_path, schema))
+    version = file_hash(csv_path)[:16]
+    return version, freeze(read_csv(csv_path))
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    store_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(csv_path)[0] + "_columns"
+    schema = build_store(csv_path, store_path)
+    print(f"Wrote {schema['rows']} rows x {len(schema['columns'])} columns to {store_path}")
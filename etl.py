@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+import dataset
+
+######################
+# Ingestion of the raw INSEE files
+#
+# Builds final_data.csv (and its column store) from the raw files of
+# https://www.kaggle.com/datasets/etiennelq/french-employment-by-town/data:
+#   python etl.py path/to/raw/files
+# Each source file is read in chunks and reduced to one partial table with one
+# row per town (CODGEO), saved in datasets/etl/. The manifest there keeps the
+# content hash of every source: a partial is rebuilt only when its source
+# changed, and final_data.csv only when a partial was rebuilt. Memory is
+# bounded by the chunk size and the number of towns, not by the file sizes.
+######################
+
+WORK_PATH = os.path.join(os.path.dirname(dataset.CSV_PATH), "etl")
+MANIFEST_FILE = "manifest.json"
+CHUNK_ROWS = 200_000
+ENCODING = "utf-8"
+
+# INSEE salary codes -> column names: SNHM = mean net salary per hour,
+# C/P/E/O = executive/middle manager/employee/worker, F/H = female/male,
+# 18/26/50 = 18-25/26-50/51+ years old, 14 = 2014
+SALARY_COLUMNS = {
+    "SNHM14": "mean_salary",
+    "SNHMC14": "mean_executive_salary",
+    "SNHMP14": "mean_middle_manager_salary",
+    "SNHME14": "mean_employee_salary",
+    "SNHMO14": "mean_worker_salary",
+    "SNHMF14": "mean_female_salary",
+    "SNHMFC14": "mean_female_executive_salary",
+    "SNHMFP14": "mean_female_middle_manager_salary",
+    "SNHMFE14": "mean_female_employee_salary",
+    "SNHMFO14": "mean_female_worker_salary",
+    "SNHMH14": "mean_male_salary",
+    "SNHMHC14": "mean_male_executive_salary",
+    "SNHMHP14": "mean_male_middle_manager_salary",
+    "SNHMHE14": "mean_male_employee_salary",
+    "SNHMHO14": "mean_male_worker_salary",
+    "SNHM1814": "mean_young_age_salary",
+    "SNHM2614": "mean_medium_age_salary",
+    "SNHM5014": "mean_old_age_salary",
+    "SNHMF1814": "mean_young_female_salary",
+    "SNHMF2614": "mean_medium_female_salary",
+    "SNHMF5014": "mean_old_female_salary",
+    "SNHMH1814": "mean_young_male_salary",
+    "SNHMH2614": "mean_medium_male_salary",
+    "SNHMH5014": "mean_old_male_salary",
+}
+
+# Firm size classes -> INSEE columns of firms by number of employees
+# (1-5, 6-9, 10-19, 20-49, 50-99, 100-199, 200-499, 500+)
+FIRM_SIZES = {
+    "Micro_firms": ["E14TS1", "E14TS6"],
+    "Small_firms": ["E14TS10", "E14TS20"],
+    "Medium_firms": ["E14TS50", "E14TS100"],
+    "Large_firms": ["E14TS200", "E14TS500"],
+}
+
+# Columns of final_data.csv, in order
+FINAL_COLUMNS = (
+    ["CODGEO", "total_firms", "nom_région", "Town", "latitude", "longitude"]
+    + list(SALARY_COLUMNS.values())
+    + ["total_population"] + list(FIRM_SIZES) + ["Departement"]
+)
+
+
+def town_codes(codes):
+    """INSEE town codes as 5 character strings ("1004" and "01004" are the same town)."""
+    return codes.astype(str).str.strip().str.zfill(5)
+
+
+######################
+# Sources: each reduces its chunks to one row per town
+######################
+
+def reduce_salaries(chunks):
+    parts = []
+    for chunk in chunks:
+        chunk = chunk.rename(columns={"LIBGEO": "Town", **SALARY_COLUMNS})
+        parts.append(chunk.set_index(town_codes(chunk.pop("CODGEO"))))
+    return pd.concat(parts)
+
+
+def reduce_firms(chunks):
+    parts = []
+    for chunk in chunks:
+        part = pd.DataFrame({"total_firms": chunk["E14TST"].to_numpy()}, index=town_codes(chunk["CODGEO"]))
+        for size, columns in FIRM_SIZES.items():
+            part[size] = chunk[columns].sum(axis=1).to_numpy()
+        parts.append(part)
+    return pd.concat(parts)
+
+
+def reduce_geography(chunks):
+    parts = []
+    for chunk in chunks:
+        departements = chunk["numéro_département"].astype(str).str.strip().str.zfill(2)
+        part = pd.DataFrame({
+            "nom_région": chunk["nom_région"].to_numpy(),
+            "Departement": (" (" + departements + ") " + chunk["nom_département"].astype(str)).to_numpy(),
+            # Some coordinates use a decimal comma, some are missing ("-")
+            "latitude": pd.to_numeric(chunk["latitude"].astype(str).str.replace(",", "."), errors="coerce").to_numpy(),
+            "longitude": pd.to_numeric(chunk["longitude"].astype(str).str.replace(",", "."), errors="coerce").to_numpy(),
+        }, index=town_codes(chunk["code_insee"]).rename("CODGEO"))
+        parts.append(part)
+    geography = pd.concat(parts)
+    # One row per postal code of a town: keep the first one
+    return geography[~geography.index.duplicated()]
+
+
+def reduce_population(chunks):
+    # One row per town x age x sex x household mode: running sums per town
+    total = None
+    for chunk in chunks:
+        part = chunk["NB"].groupby(town_codes(chunk["CODGEO"])).sum()
+        total = part if total is None else total.add(part, fill_value=0)
+    return total.round().astype("int64").to_frame("total_population")
+
+
+# name -> (file, columns read, reducer)
+SOURCES = {
+    "salaries": ("net_salary_per_town_categories.csv", ["CODGEO", "LIBGEO"] + list(SALARY_COLUMNS), reduce_salaries),
+    "firms": ("base_etablissement_par_tranche_effectif.csv", ["CODGEO", "E14TST"] + [c for columns in FIRM_SIZES.values() for c in columns], reduce_firms),
+    "geography": ("name_geographic_information.csv", ["code_insee", "nom_région", "numéro_département", "nom_département", "latitude", "longitude"], reduce_geography),
+    "population": ("population.csv", ["CODGEO", "NB"], reduce_population),
+}
+
+
+######################
+# Manifest and partials
+######################
+
+def read_manifest(work_path):
+    path = os.path.join(work_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"sources": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(work_path, manifest):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    write_atomic(os.path.join(work_path, MANIFEST_FILE), write)
+
+
+def write_atomic(path, write):
+    """Calls write(temporary path), then moves the file in place: readers never see a half-written file."""
+    temporary = f"{path}.tmp"
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def source_hash(path, previous):
+    """Content hash of a source, reusing the manifest's when its size and modification time did not change."""
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous["sha256"], stat
+    return dataset.file_hash(path), stat
+
+
+def build_partial(raw_path, name, chunk_rows):
+    """Reads one source in chunks and returns its table, one row per town."""
+    filename, columns, reduce = SOURCES[name]
+    chunks = pd.read_csv(os.path.join(raw_path, filename), usecols=columns, dtype={c: str for c in ["CODGEO", "code_insee", "numéro_département"]}, encoding=ENCODING, chunksize=chunk_rows, low_memory=False)
+    return reduce(chunks)
+
+
+def partial_path(work_path, name):
+    return os.path.join(work_path, f"{name}.csv")
+
+
+def read_partial(work_path, name):
+    return pd.read_csv(partial_path(work_path, name), index_col=0, dtype={0: str}, encoding="utf-8")
+
+
+######################
+# Final dataset
+######################
+
+def join_partials(partials):
+    """Joins the partial tables on the town code into the rows and columns of final_data.csv."""
+    final = partials["salaries"].join([partials["firms"], partials["geography"], partials["population"]], how="inner")
+    final = final.dropna(subset=["latitude", "longitude"])
+    # The app stores CODGEO as an integer: Corsican codes (2A..., 2B...) cannot be kept
+    codes = pd.to_numeric(final.index.to_series(), errors="coerce").to_numpy()
+    final = final[~pd.isna(codes)].reset_index(drop=True).assign(CODGEO=codes[~pd.isna(codes)].astype("int64"))
+    return final.sort_values("CODGEO", ignore_index=True)[FINAL_COLUMNS]
+
+
+def run(raw_path, output=dataset.CSV_PATH, work_path=WORK_PATH, chunk_rows=CHUNK_ROWS, force=False):
+    """Rebuilds the partials of the changed sources, then final_data.csv and its column store if needed.
+
+    Returns the names of the rebuilt partials and whether the output was rebuilt.
+    """
+    os.makedirs(work_path, exist_ok=True)
+    manifest = read_manifest(work_path)
+    rebuilt = []
+    for name, (filename, _, _) in SOURCES.items():
+        previous = manifest["sources"].get(name)
+        digest, stat = source_hash(os.path.join(raw_path, filename), previous)
+        if force or previous is None or previous["sha256"] != digest or not os.path.exists(partial_path(work_path, name)):
+            partial = build_partial(raw_path, name, chunk_rows)
+            write_atomic(partial_path(work_path, name), lambda path: partial.to_csv(path, encoding="utf-8"))
+            rebuilt.append(name)
+        manifest["sources"][name] = {"file": filename, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+    output_rebuilt = force or bool(rebuilt) or not os.path.exists(output)
+    if output_rebuilt:
+        final = join_partials({name: read_partial(work_path, name) for name in SOURCES})
+        write_atomic(output, lambda path: final.to_csv(path, encoding="utf-8"))
+        dataset.build_store(output, os.path.splitext(output)[0] + "_columns")
+        manifest["output"] = {"file": output, "rows": len(final), "sha256": dataset.file_hash(output)}
+
+    # Written last: an interrupted run rebuilds what it had not recorded
+    write_manifest(work_path, manifest)
+    return rebuilt, output_rebuilt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds final_data.csv from the raw INSEE files, rebuilding only what changed.")
+    parser.add_argument("raw_path", help="directory of the raw CSV files of the Kaggle dataset")
+    parser.add_argument("--output", default=dataset.CSV_PATH, help="dataset to write (its column store is written next to it)")
+    parser.add_argument("--work", default=WORK_PATH, help="directory of the partial tables and of the manifest")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows read at once from each source")
+    parser.add_argument("--force", action="store_true", help="rebuild everything")
+    args = parser.parse_args()
+
+    rebuilt, output_rebuilt = run(args.raw_path, args.output, args.work, args.chunk_rows, args.force)
+    print(f"Rebuilt partials: {', '.join(rebuilt) or 'none'}")
+    print(f"Wrote {args.output}" if output_rebuilt else f"{args.output} is up to date")
@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+######################
+# Cache of rendered figures
+#
+# Figures are stored as plotly dicts under a key made of the inputs of the
+# chart (filter bounds, selected towns, segmentation...). A hit rebuilds the
+# figure without validating it again: it was validated when it was built. The cache is shared
+# by every session, bounded in number of entries and in bytes, and evicts the
+# least recently used figures first.
+######################
+
+# Defaults, overridden by the DV_FIGURE_CACHE_ENTRIES / DV_FIGURE_CACHE_MB environment variables
+MAX_ENTRIES = 256
+MAX_MEGABYTES = 64
+
+
+def normalize(value):
+    """Turns widget values into a hashable key: numpy scalars and sequences become Python values and tuples."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        # 12.000000001 and 12.0 from two sliders are the same filter
+        return round(value, 6)
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalize(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(normalize(item) for item in value))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(normalize(item) for item in value)
+    return value
+
+
+class FigureCache:
+    """Thread-safe LRU cache of figure dicts with an entry and a memory cap."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_MEGABYTES * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_dict(self, key, build):
+        """Returns the dict of the figure of key, calling build() to create it on a miss."""
+        key = normalize(key)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        # Built outside the lock so other sessions are not blocked meanwhile
+        fig = build()
+        fig_dict = fig.to_dict()
+        # Sized by its JSON, which is what the browser receives
+        self.put(key, fig_dict, len(fig.to_json()))
+        return fig_dict
+
+    def figure(self, key, build):
+        """Returns a new Figure for key, built by build() on a miss."""
+        # The Figure copies the dict: callers can change it without touching the cache
+        return go.Figure(self.get_dict(key, build), _validate=False)
+
+    def put(self, key, fig_dict, size):
+        """Stores a figure dict of size bytes, evicting the least recently used ones above the caps."""
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (fig_dict, size)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every figure (the counters are kept)."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Counters used to size the cache."""
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "megabytes": round(self.size / 2 ** 20, 2),
+                "max_megabytes": round(self.max_bytes / 2 ** 20, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / requests, 3) if requests else None,
+            }
+
+
+def from_environment():
+    """FigureCache sized by DV_FIGURE_CACHE_ENTRIES and DV_FIGURE_CACHE_MB."""
+    max_entries = int(os.environ.get("DV_FIGURE_CACHE_ENTRIES", MAX_ENTRIES))
+    max_megabytes = float(os.environ.get("DV_FIGURE_CACHE_MB", MAX_MEGABYTES))
+    return FigureCache(max_entries, int(max_megabytes * 2 ** 20))
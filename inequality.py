@@ -0,0 +1,162 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+######################
+# Inequality metrics
+#
+# Population-weighted Gini and Theil indices of the town mean salaries, and
+# pay gaps between population-weighted segment means, for every group of a
+# geographic level. Each metric is computed for all the groups of a level at
+# once: the towns are sorted by (group, salary) and the sums are bincounts
+# over the group codes. Every group keeps a fingerprint of its towns, so
+# update() only recomputes the groups whose towns changed.
+######################
+
+# Geographic levels: name -> columns identifying a group
+LEVELS = {
+    "France": [],
+    "Region": ["nom_région"],
+    "Departement": ["nom_région", "Departement"],
+}
+
+# Pay gaps: name -> (segment column, reference column), in % of the reference
+GAPS = {
+    "gender_gap": ("mean_female_salary", "mean_male_salary"),
+    "age_gap": ("mean_young_age_salary", "mean_old_age_salary"),
+    "category_gap": ("mean_worker_salary", "mean_executive_salary"),
+}
+
+# Display names of the metrics, in the order of the tables
+METRICS = {
+    "towns": "Towns",
+    "total_population": "Population",
+    "mean_salary": "Mean salary (€ / hour)",
+    "gini": "Gini index",
+    "theil": "Theil index",
+    "gender_gap": "Gender pay gap (%)",
+    "age_gap": "Young / old pay gap (%)",
+    "category_gap": "Worker / executive pay gap (%)",
+}
+
+# Columns the metrics depend on, hashed for the fingerprints
+SALARY_COLUMNS = ["mean_salary"] + sorted({column for pair in GAPS.values() for column in pair})
+
+
+def weighted_means(codes, n_groups, values, weights):
+    """Weighted mean of values in each group, NaN values left out."""
+    valid = ~np.isnan(values)
+    totals = np.bincount(codes, weights=np.where(valid, weights, 0), minlength=n_groups)
+    sums = np.bincount(codes, weights=np.where(valid, values * weights, 0), minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / totals
+
+
+def gini_theil(codes, n_groups, values, weights):
+    """Weighted Gini and Theil indices of values in each group, NaN values left out."""
+    valid = ~np.isnan(values) & (weights > 0)
+    codes, values, weights = codes[valid], values[valid], weights[valid]
+    order = np.lexsort((values, codes))
+    codes, values, weights = codes[order], values[order], weights[order]
+
+    income = values * weights
+    total_weight = np.bincount(codes, weights=weights, minlength=n_groups)
+    total_income = np.bincount(codes, weights=income, minlength=n_groups)
+    # Income of the poorer towns of the same group, before each town
+    before = np.cumsum(income) - income - (np.cumsum(total_income) - total_income)[codes]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # 1 - twice the area under the Lorenz curve, summed as trapezes
+        gini = 1 - np.bincount(codes, weights=weights * (2 * before + income), minlength=n_groups) / (total_weight * total_income)
+        ratio = values / (total_income / total_weight)[codes]
+        theil = np.bincount(codes, weights=weights * ratio * np.log(ratio), minlength=n_groups) / total_weight
+    return gini, theil
+
+
+def group_metrics(codes, n_groups, data):
+    """Table of the metrics of each group (rows in code order) for the towns of data."""
+    weights = data["total_population"].to_numpy(dtype="float64")
+    salaries = data["mean_salary"].to_numpy(dtype="float64")
+    table = pd.DataFrame({
+        "towns": np.bincount(codes, minlength=n_groups),
+        "total_population": np.bincount(codes, weights=weights, minlength=n_groups).astype("int64"),
+        "mean_salary": weighted_means(codes, n_groups, salaries, weights),
+    })
+    table["gini"], table["theil"] = gini_theil(codes, n_groups, salaries, weights)
+    for gap, (column, reference) in GAPS.items():
+        segment = weighted_means(codes, n_groups, data[column].to_numpy(dtype="float64"), weights)
+        baseline = weighted_means(codes, n_groups, data[reference].to_numpy(dtype="float64"), weights)
+        table[gap] = 100 * (1 - segment / baseline)
+    return table
+
+
+def group_codes(data, columns):
+    """Code of the group of each town and the labels (tuples) of the groups."""
+    if not columns:
+        return np.zeros(len(data), dtype="int64"), [()]
+    codes, labels = pd.MultiIndex.from_arrays([data[column].astype(str).to_numpy() for column in columns]).factorize()
+    return codes.astype("int64"), list(labels)
+
+
+def group_fingerprints(codes, n_groups, data):
+    """Fingerprint of the towns of each group: the wrapping sum of the hashes of their rows."""
+    hashes = pd.util.hash_pandas_object(data[["CODGEO", "total_population"] + SALARY_COLUMNS], index=False).to_numpy()
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(codes[order], np.arange(n_groups))
+    return np.add.reduceat(hashes[order], starts) if len(order) else np.zeros(n_groups, dtype="uint64")
+
+
+class InequalityMetrics:
+    """Inequality metrics of every group of every geographic level, updated incrementally."""
+
+    def __init__(self, data):
+        # level -> table of the metrics indexed by group label, level -> {label: fingerprint}
+        self.tables = {}
+        self.fingerprints = {}
+        self.update(data)
+
+    def update(self, data):
+        """Recomputes the groups whose towns changed; returns the number of recomputed groups per level."""
+        recomputed = {}
+        for level, columns in LEVELS.items():
+            codes, labels = group_codes(data, columns)
+            fingerprints = dict(zip(labels, group_fingerprints(codes, len(labels), data).tolist()))
+            previous = self.fingerprints.get(level, {})
+            changed = [code for code, label in enumerate(labels) if previous.get(label) != fingerprints[label]]
+            recomputed[level] = len(changed)
+
+            kept = self.tables[level].loc[[label for label in labels if previous.get(label) == fingerprints[label]]] if level in self.tables else None
+            if changed:
+                # Only the towns of the changed groups, with their groups renumbered 0..len(changed)-1
+                renumber = np.full(len(labels), -1, dtype="int64")
+                renumber[changed] = np.arange(len(changed))
+                new_codes = renumber[codes]
+                rows = new_codes >= 0
+                table = group_metrics(new_codes[rows], len(changed), data[rows])
+                table.index = pd.Index([labels[code] for code in changed], tupleize_cols=False)
+                kept = table if kept is None else pd.concat([kept, table])
+            self.tables[level] = kept.loc[pd.Index(labels, tupleize_cols=False)]
+            self.fingerprints[level] = fingerprints
+        return recomputed
+
+    def updated(self, data):
+        """A copy updated for data that reuses the unchanged groups; self is left as is for its readers."""
+        metrics = copy.copy(self)
+        metrics.tables = dict(self.tables)
+        metrics.fingerprints = dict(self.fingerprints)
+        metrics.update(data)
+        return metrics
+
+    def table(self, level, region=None):
+        """Metrics of the groups of a level with their names as columns, restricted to one region if given."""
+        table = self.tables[level]
+        names = pd.DataFrame(table.index.tolist(), columns=LEVELS[level], index=table.index)
+        table = pd.concat([names, table], axis=1).reset_index(drop=True)
+        if region is not None and "nom_région" in table:
+            table = table[table["nom_région"] == region]
+        return table
+
+    def national(self):
+        """Metrics of the whole country."""
+        return self.tables["France"].iloc[0]
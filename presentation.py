@@ -0,0 +1,23 @@
+######################
+# Display names
+#
+# The shared dataset keeps its column names. The pages apply these names at
+# the last moment: as plotly labels, and on the small tables they show, never
+# on the dataset itself.
+######################
+
+COLUMN_NAMES = {
+    "Town": "Town",
+    "nom_région": "Region",
+    "Departement": "Departement",
+    "total_population": "Total Population",
+    "longitude": "Longitude",
+    "latitude": "Latitude",
+    "mean_salary": "Mean net salary per hour (€)",
+    "total_firms": "Total firms",
+}
+
+
+def for_display(table, names=None):
+    """A table with display names as column names (names override COLUMN_NAMES)."""
+    return table.rename(columns=dict(COLUMN_NAMES, **(names or {})))
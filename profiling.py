@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import streamlit as st
+
+######################
+# Rerun profiling
+#
+# Opt-in with the DV_PROFILE=1 environment variable or the ?profile=1 query
+# parameter. Each named stage of a rerun (data load, reshaping, filtering,
+# figure construction, chart serialization) is timed with its row count and
+# payload size, shown in a sidebar panel and logged as one JSON line per rerun
+# on the "dv.profile" logger. Each rerun also reports the size of the session
+# state it keeps and, with DV_PROFILE=1 only, the peak memory it allocated:
+# tracemalloc slows every thread of the process, so a ?profile=1 visit does
+# not turn it on for the other sessions.
+######################
+
+logger = logging.getLogger("dv.profile")
+if not logger.handlers:
+    # Streamlit does not configure the root logger: print the JSON lines to stderr ourselves
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Profiler of the rerun running in this thread (Streamlit runs each session in its own thread)
+_local = threading.local()
+
+
+class Profiler:
+    """Stages of one rerun; does nothing when disabled."""
+
+    def __init__(self, enabled, page=None):
+        self.enabled = enabled
+        self.page = page
+        self.stages = []
+        self.depth = 0
+        self.start = time.perf_counter()
+        # Allocations are traced for the whole process, so only when it is profiled as a whole
+        self.traced = enabled and os.environ.get("DV_PROFILE") == "1"
+        if self.traced:
+            # tracemalloc counts every thread: with concurrent reruns the peak is an upper bound
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.allocated = tracemalloc.get_traced_memory()[0]
+
+    @contextmanager
+    def stage(self, name, **info):
+        """Times the block; the yielded dict can be filled with rows/bytes counts."""
+        record = dict(info)
+        if not self.enabled:
+            yield record
+            return
+        record.update(stage=name, depth=self.depth)
+        self.stages.append(record)
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self.depth -= 1
+
+    def total_ms(self):
+        return round((time.perf_counter() - self.start) * 1000, 2)
+
+    def peak_allocated_mb(self):
+        """Peak of the memory allocated since the start of the rerun (None unless DV_PROFILE=1)."""
+        if not self.traced:
+            return None
+        return round((tracemalloc.get_traced_memory()[1] - self.allocated) / 2 ** 20, 2)
+
+
+def is_enabled():
+    """True if profiling was asked for by environment variable or query parameter."""
+    if os.environ.get("DV_PROFILE") == "1":
+        return True
+    try:
+        return st.query_params.get("profile") == "1"
+    except Exception:
+        return False
+
+
+def start(page=None):
+    """Starts profiling a rerun and returns its Profiler."""
+    _local.profiler = Profiler(is_enabled(), page)
+    return _local.profiler
+
+
+def current():
+    """Profiler of the current rerun (a disabled one outside of a rerun)."""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        profiler = _local.profiler = Profiler(False)
+    return profiler
+
+
+def stage(name, **info):
+    """Times a stage of the current rerun: with profiling.stage("filtering") as s: s["rows"] = ..."""
+    return current().stage(name, **info)
+
+
+def plotly_chart(fig, name="chart", **kwargs):
+    """st.plotly_chart, timed and with the size of the figure JSON when profiling."""
+    profiler = current()
+    with profiler.stage(f"serialization: {name}") as record:
+        if profiler.enabled:
+            record["bytes"] = len(fig.to_json())
+        st.plotly_chart(fig, **kwargs)
+
+
+def session_state_bytes():
+    """Pickled size of the session state of the current session (values that cannot be pickled are skipped)."""
+    size = 0
+    for key in list(st.session_state.keys()):
+        try:
+            size += len(pickle.dumps(st.session_state[key]))
+        except Exception:
+            pass
+    return size
+
+
+def finish(extra=None):
+    """Logs the stages of the rerun and shows them in the sidebar."""
+    profiler = current()
+    if not profiler.enabled:
+        return
+    report = {"page": profiler.page, "total_ms": profiler.total_ms(), "peak_allocated_mb": profiler.peak_allocated_mb(), "session_state_bytes": session_state_bytes(), "stages": profiler.stages}
+    if extra:
+        report.update(extra)
+    logger.info(json.dumps(report, ensure_ascii=False, default=str))
+
+    with st.sidebar.expander("Profiling", expanded=False):
+        allocated = "" if report["peak_allocated_mb"] is None else f", {report['peak_allocated_mb']} MB allocated at peak"
+        st.write(f"Rerun of {profiler.page}: {report['total_ms']} ms{allocated}, {report['session_state_bytes']} bytes of session state")
+        st.dataframe(
+            [{"stage": "  " * s["depth"] + s["stage"], "ms": s.get("ms"), "rows": s.get("rows"), "bytes": s.get("bytes")} for s in profiler.stages],
+            hide_index=True,
+        )
+        for name, value in (extra or {}).items():
+            st.write(name)
+            st.json(value)
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+######################
+# Range filters over numeric columns
+#
+# Each indexed column keeps its values sorted together with the row positions
+# they come from. A range filter is then two binary searches, and several
+# filters are combined by intersecting the row positions.
+######################
+
+
+class RangeQueryEngine:
+    """Sorted indexes over numeric columns of a DataFrame."""
+
+    def __init__(self, data, columns):
+        self.size = len(data)
+        self.indexes = {}
+        for column in columns:
+            values = data[column].to_numpy()
+            order = np.argsort(values, kind="stable")
+            sorted_values = values[order]
+            # NaN are sorted last, they never match a range
+            valid = len(sorted_values)
+            if sorted_values.dtype.kind == "f":
+                valid -= int(np.isnan(sorted_values).sum())
+            self.indexes[column] = (sorted_values[:valid], order[:valid])
+
+    def bounds(self, column):
+        """Returns the (min, max) of a column as Python numbers."""
+        sorted_values = self.indexes[column][0]
+        return to_python(sorted_values[0]), to_python(sorted_values[-1])
+
+    def range(self, column, low=None, high=None):
+        """Row positions (unsorted) with low <= value <= high. None is an open bound."""
+        sorted_values, order = self.indexes[column]
+        # Compare in the column dtype so that 11.2 matches a float32 11.2
+        start = 0 if low is None else np.searchsorted(sorted_values, search_key(low, sorted_values.dtype, "left"), side="left")
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, search_key(high, sorted_values.dtype, "right"), side="right")
+        return order[start:max(start, stop)]
+
+    def query(self, bounds):
+        """Row positions, in increasing order, matching every {column: (low, high)} range."""
+        if not bounds:
+            return np.arange(self.size)
+        hits = sorted((self.range(column, low, high) for column, (low, high) in bounds.items()), key=len)
+        # Start from the most selective filter so the intersections stay small
+        positions = np.sort(hits[0])
+        for other in hits[1:]:
+            if not len(positions):
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+
+def search_key(value, dtype, side):
+    """A bound in the column dtype; for integer columns it is rounded inwards and clipped to the dtype's range."""
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        # A number input accepts any value: 3e9 is above every int32 population
+        if value >= info.max:
+            return np.asarray(info.max, dtype=dtype)
+        if value <= info.min:
+            return np.asarray(info.min, dtype=dtype)
+        value = math.ceil(value) if side == "left" else math.floor(value)
+    return np.asarray(value, dtype=dtype)
+
+
+def to_python(value):
+    """Converts a numpy scalar to int/float, keeping float32 values at their printed precision."""
+    if isinstance(value, np.integer):
+        return int(value)
+    # str() gives the shortest repr of the stored dtype: float32 11.2 -> "11.2"
+    return float(str(value))
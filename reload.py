@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+
+import profiling
+
+######################
+# Hot reload of the dataset
+#
+# A Snapshot is one version of the dataset, named by the hash of its files,
+# with the objects derived from it (indexes, cube, metrics) built on first
+# use. DataReloader keeps the current snapshot and checks the data files in a
+# background thread. When their content changes, it loads the new dataset,
+# rebuilds in that thread the objects the current snapshot had built, and only
+# then makes the new snapshot current. A rerun keeps the snapshot it started
+# with, so a page never mixes two versions; the previous snapshot is freed
+# when the last rerun using it ends.
+######################
+
+# Default seconds between two checks of the data files (DV_RELOAD_INTERVAL, 0 turns them off)
+RELOAD_INTERVAL = 5
+
+# Snapshot used by the rerun running in this thread
+_pinned = threading.local()
+
+
+def start_rerun():
+    """Unpins the snapshot of the previous rerun of this thread: the next one asked for is the current one."""
+    _pinned.snapshot = None
+
+
+class Snapshot:
+    """One version of the dataset and the objects derived from it."""
+
+    def __init__(self, version, data, builders):
+        self.version = version
+        self.data = data
+        # name -> build(data, the object of that name in the previous snapshot or None)
+        self.builders = builders
+        self.objects = {}
+        self.locks = {name: threading.Lock() for name in builders}
+
+    def get(self, name, previous=None):
+        """The derived object name, built on first use (concurrent callers wait for a single build)."""
+        if name not in self.objects:
+            with self.locks[name]:
+                if name not in self.objects:
+                    self.objects[name] = self.builders[name](self.data, previous)
+        return self.objects[name]
+
+
+class DataReloader:
+    """Current snapshot of the dataset, replaced when the data files change."""
+
+    def __init__(self, load, file_stats, fingerprint, builders, on_swap=None):
+        self.load = load
+        self.file_stats = file_stats
+        self.fingerprint = fingerprint
+        self.builders = builders
+        # Called with the previous and the new snapshot once the new one is current
+        self.on_swap = on_swap
+        self.seen = file_stats()
+        self.pending = None
+        # load() returns the data with its version, computed from the files it read
+        self.current = Snapshot(*load(), builders)
+        self.reloads = 0
+        # Set by stop(): a reloader dropped from the cache must not keep its snapshot nor swap the shared caches
+        self.stopped = threading.Event()
+
+    def snapshot(self):
+        """The snapshot of this rerun: the current one when first asked for, then the same until the next rerun."""
+        pinned = getattr(_pinned, "snapshot", None)
+        if pinned is None:
+            pinned = _pinned.snapshot = self.current
+        return pinned
+
+    def check(self):
+        """Reloads the dataset if its files changed; returns True if a new snapshot was made current."""
+        stats = self.file_stats()
+        if stats == self.seen:
+            return False
+        if stats != self.pending:
+            # Still being written maybe: reloaded once the files stay the same for one more check
+            self.pending = stats
+            return False
+        self.seen = stats
+        version = self.fingerprint()
+        if version == self.current.version:
+            # Touched or rewritten with the same content
+            return False
+
+        start = time.perf_counter()
+        previous = self.current
+        snapshot = Snapshot(*self.load(), self.builders)
+        if snapshot.version == previous.version:
+            # What load() read is the data already served
+            return False
+        if self.stopped.is_set():
+            return False
+        steps = {"load data": round((time.perf_counter() - start) * 1000, 1)}
+        # Built before the swap, so that no session waits for them
+        for name, built in list(previous.objects.items()):
+            step = time.perf_counter()
+            snapshot.get(name, built)
+            steps[name] = round((time.perf_counter() - step) * 1000, 1)
+        if self.stopped.is_set():
+            return False
+        self.current = snapshot
+        self.reloads += 1
+        if self.on_swap is not None:
+            self.on_swap(previous, snapshot)
+        profiling.logger.info(json.dumps({"reload": snapshot.version, "previous": previous.version, "rows": len(snapshot.data), "ms": round((time.perf_counter() - start) * 1000, 1), "steps": steps}))
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """Calls check() every interval seconds in a background thread, until stop(); returns the thread."""
+        def loop():
+            while not self.stopped.wait(interval):
+                try:
+                    self.check()
+                except Exception as error:
+                    # The current snapshot stays in use; retried when the files change again
+                    profiling.logger.exception("Reload failed: %s", error)
+
+        thread = threading.Thread(target=loop, name="dv-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stops the checks of watch(); a reload in progress is not made current."""
+        self.stopped.set()
+
+    def stats(self):
+        """Version of the current snapshot and number of reloads."""
+        return {"version": self.current.version, "rows": len(self.current.data), "reloads": self.reloads, "derived": sorted(self.current.objects)}
@@ -0,0 +1,38 @@
+import numpy as np
+
+######################
+# Segments of the salary columns
+#
+# The dataset is wide: one mean_*_salary column per segment of the population.
+# The pages select the columns of a segmentation for a set of towns with one
+# column slice, instead of building one row per (town, segment).
+######################
+
+SALARY_LABEL = "Mean Salary net per hour (€)"
+
+GENDERS = ["male", "female"]
+CATEGORIES = ["worker", "employee", "middle_manager", "executive"]
+AGES = ["young", "medium", "old"]
+
+# Segmentations of the comparison page: displayed segment -> salary column
+SEGMENTATIONS = {
+    "Socio-professional Category": {
+        "Executive": "mean_executive_salary",
+        "Middle Manager": "mean_middle_manager_salary",
+        "Employee": "mean_employee_salary",
+        "Worker": "mean_worker_salary",
+    },
+    "Age": {age.capitalize(): f"mean_{age}_age_salary" for age in AGES},
+    "Gender": {gender.capitalize(): f"mean_{gender}_salary" for gender in GENDERS},
+}
+
+
+def segment_matrix(data, positions, segmentation):
+    """Salaries of the towns at positions (rows) for each segment of segmentation (columns).
+
+    Returns the segment names and a (towns x segments) float array.
+    """
+    columns = SEGMENTATIONS[segmentation]
+    positions = np.asarray(positions, dtype="int64")
+    matrix = np.column_stack([data[column].to_numpy()[positions] for column in columns.values()]) if len(positions) else np.empty((0, len(columns)))
+    return list(columns), matrix
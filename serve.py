@@ -0,0 +1,21 @@
+"""Runs the app with its caches filled while the server starts.
+
+    python serve.py [streamlit run options]
+
+Same as `streamlit run main_page.py`, but the dataset, the shared indexes and
+the page modules are loaded in the background from the start of the process,
+so the first session of a fresh worker does not wait for them.
+"""
+import os
+import sys
+
+from streamlit.web import cli
+
+import startup
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main_page.py")
+
+if __name__ == "__main__":
+    startup.prewarm(wait_for_runtime=True)
+    sys.argv = ["streamlit", "run", APP] + sys.argv[1:]
+    sys.exit(cli.main())
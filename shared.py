@@ -0,0 +1,175 @@
+import os
+
+import streamlit as st
+import numpy as np
+
+import dataset
+import query
+import spatial
+import stats
+import cube
+import figure_cache
+import profiling
+import town_search
+import inequality
+import presentation
+import reload
+
+######################
+# Caches and helpers shared by the pages
+#
+# Each page module of views/ imports this module; the cached objects are
+# built once per process and shared by every session. The dataset and the
+# objects derived from it belong to a snapshot of the data files, replaced
+# when the files change (see reload.py): the cached tables below are keyed by
+# the version of the snapshot and the previous versions are evicted on reload.
+######################
+
+def build_query_engine(data, previous):
+    """Sorted indexes for the range filters of the map overview."""
+    return query.RangeQueryEngine(data, ["total_population", "mean_salary", "total_firms", "Micro_firms", "Small_firms", "Medium_firms", "Large_firms"])
+
+def build_town_index(data, previous):
+    """Prefix/trigram index of the town names for the town selectors."""
+    return town_search.TownIndex(data)
+
+def build_cube(data, previous):
+    """Region x departement x category x gender x age statistics."""
+    return cube.AggregationCube(data)
+
+def build_spatial_index(data, previous):
+    """Grid index of the town coordinates for the radius and nearest-town queries."""
+    return spatial.SpatialIndex(data["latitude"].to_numpy(), data["longitude"].to_numpy())
+
+def build_town_codes(data, previous):
+    """Sorted CODGEO and their positions, to find the towns a session chose again after a reload."""
+    codes = data["CODGEO"].to_numpy()
+    order = np.argsort(codes, kind="stable")
+    return codes[order], order
+
+def build_inequality_metrics(data, previous):
+    """Gini, Theil and pay gaps of every region and departement: on reload, only the groups whose towns changed are recomputed."""
+    return inequality.InequalityMetrics(data) if previous is None else previous.updated(data)
+
+# Objects derived from each snapshot of the dataset: name -> build(data, previous object)
+DERIVED = {
+    "query engine": build_query_engine,
+    "town index": build_town_index,
+    "cube": build_cube,
+    "spatial index": build_spatial_index,
+    "inequality metrics": build_inequality_metrics,
+    "town codes": build_town_codes,
+}
+
+def evict(previous, snapshot):
+    """Drops the tables and figures of the previous version of the dataset.
+
+    A rerun still pinned to the previous snapshot can add entries of its
+    version back after this: they are never read again, and the max_entries
+    of each cache (least recently used first) bounds them until they are
+    pushed out or the next reload clears them.
+    """
+    for cached in (_column_summary, _area_salaries, _cube_summaries):
+        cached.clear()
+    load_figure_cache().clear()
+
+@st.cache_resource(on_release=reload.DataReloader.stop) # Current snapshot of the dataset, checked for changes in the background; stopped when cleared
+def load_reloader():
+    """Reloader of the dataset, read from the typed column store if it was built (python dataset.py), from the CSV otherwise."""
+    reloader = reload.DataReloader(dataset.load_version, dataset.file_stats, dataset.fingerprint, DERIVED, on_swap=evict)
+    interval = float(os.environ.get("DV_RELOAD_INTERVAL", reload.RELOAD_INTERVAL))
+    if interval > 0:
+        reloader.watch(interval)
+    return reloader
+
+def snapshot():
+    return load_reloader().snapshot()
+
+def load_data():
+    return snapshot().data
+
+def load_query_engine():
+    return snapshot().get("query engine")
+
+def load_town_index():
+    return snapshot().get("town index")
+
+def load_cube():
+    return snapshot().get("cube")
+
+def load_spatial_index():
+    return snapshot().get("spatial index")
+
+def load_inequality_metrics():
+    return snapshot().get("inequality metrics")
+
+@st.cache_resource # Figures shared by every session (bounded LRU)
+def load_figure_cache():
+    return figure_cache.from_environment()
+
+@st.cache_data(max_entries=16) # Box plot summary of a column of the dataset
+def _column_summary(version, column):
+    summary = stats.box_summary(load_data()[column].to_numpy(), load_data()["Town"].to_numpy())
+    summary["name"] = presentation.COLUMN_NAMES[column]
+    return summary
+
+def column_summary(column):
+    return _column_summary(snapshot().version, column)
+
+@st.cache_resource(max_entries=10) # Sorted mean salaries of the approximate commuting areas of every town, for one radius (10 radii on the slider)
+def _area_salaries(version, radius_km):
+    data = load_data()
+    # Index with cells a few times smaller than the radius, for the per-cell sums
+    index = spatial.SpatialIndex(data["latitude"].to_numpy(), data["longitude"].to_numpy(), cell_km=radius_km / spatial.AREA_CELLS)
+    _, _, salaries, _ = index.neighbourhood_aggregates(radius_km, data["total_population"].to_numpy(), data["mean_salary"].to_numpy())
+    # Shared by every session without a copy: read-only
+    return dataset.read_only(np.sort(salaries[:, 0]))
+
+def area_salary_rank(mean_salary, radius_km):
+    """Share (%) of the radius_km commuting areas of all the towns with a lower mean salary."""
+    salaries = _area_salaries(snapshot().version, radius_km)
+    if np.isnan(mean_salary):
+        return 0.0
+    # NaN areas are sorted last: counted in the total, never below
+    return 100 * np.searchsorted(salaries, mean_salary, side="left") / len(salaries)
+
+@st.cache_data(max_entries=512) # Violin summaries of each label of a segment for one selection of the inequality page
+def _cube_summaries(version, segment, labels, region="All", departement="All", **fixed):
+    towns = load_data()["Town"].to_numpy()
+    summaries = []
+    for label in labels:
+        values, rows = load_cube().cell_values(region, departement, **dict(fixed, **{segment: label}))
+        summary = stats.box_summary(values, towns[rows])
+        if summary is not None:
+            summary["name"] = label
+            summary["kde"] = stats.kde_curve(values)
+            summaries.append(summary)
+    return summaries
+
+def cube_summaries(segment, labels, region="All", departement="All", **fixed):
+    return _cube_summaries(snapshot().version, segment, labels, region, departement, **fixed)
+
+def town_positions(codes):
+    """Positions, in the dataset of this rerun, of the towns with the given CODGEO (in order, the missing ones left out)."""
+    sorted_codes, order = snapshot().get("town codes")
+    codes = np.asarray(codes, dtype=sorted_codes.dtype)
+    found = np.minimum(np.searchsorted(sorted_codes, codes), len(sorted_codes) - 1)
+    return order[found[sorted_codes[found] == codes]].tolist()
+
+def get_data():
+    """The shared dataset, timed as the "data load" stage of the rerun."""
+    with profiling.stage("data load") as record:
+        data = load_data()
+        record["rows"] = len(data)
+    return data
+
+def rows(positions, columns):
+    """The given columns of the towns at positions: pages copy only what they show, never the whole shared dataset."""
+    return load_data()[columns].iloc[positions]
+
+def show_figure(key, build):
+    """Shows the figure of key (its first item names the chart), built by build() on a cache miss."""
+    with profiling.stage(f"figure: {key[0]}"):
+        # Keyed by the version of the dataset too: a reload never shows a figure of the previous data
+        fig = load_figure_cache().figure(key + (snapshot().version,), build)
+    profiling.plotly_chart(fig, key[0])
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+
+######################
+# Spatial helpers over the town coordinates
+######################
+
+# Width of a map cluster on screen, in pixels of a 256px mapbox tile
+CLUSTER_PIXELS = 24
+
+
+def cell_size_for_zoom(zoom):
+    """Side (in degrees) of a grid cell covering about CLUSTER_PIXELS on screen at this zoom."""
+    return 360 / 2 ** zoom * CLUSTER_PIXELS / 256
+
+
+def grid_clusters(latitude, longitude, values, cell_size):
+    """Aggregates points into square latitude/longitude cells.
+
+    Returns one row per non-empty cell with the centroid of its points, the
+    number of points and the mean of values (NaN values are ignored).
+    """
+    latitude = np.asarray(latitude, dtype="float64")
+    longitude = np.asarray(longitude, dtype="float64")
+    values = np.asarray(values, dtype="float64")
+
+    if not len(latitude):
+        return pd.DataFrame({"latitude": [], "longitude": [], "towns": [], "mean_value": []})
+
+    cell_lat = np.floor(latitude / cell_size).astype("int64")
+    cell_lon = np.floor(longitude / cell_size).astype("int64")
+    # One integer key per cell, then cells numbered 0..n_cells-1
+    cell_lon -= cell_lon.min()
+    keys = cell_lat * (cell_lon.max() + 1) + cell_lon
+    _, cells = np.unique(keys, return_inverse=True)
+
+    counts = np.bincount(cells)
+    valid = ~np.isnan(values)
+    value_counts = np.bincount(cells, weights=valid)
+    value_sums = np.bincount(cells, weights=np.where(valid, values, 0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_values = value_sums / value_counts
+
+    return pd.DataFrame({
+        "latitude": np.bincount(cells, weights=latitude) / counts,
+        "longitude": np.bincount(cells, weights=longitude) / counts,
+        "towns": counts,
+        "mean_value": mean_values,
+    })
+
+
+def view_for_points(latitude, longitude, width=710, height=950):
+    """Returns the (center, zoom) of a map view showing every point."""
+    latitude = np.asarray(latitude, dtype="float64")
+    longitude = np.asarray(longitude, dtype="float64")
+    if not len(latitude):
+        return None, None
+    center = {"lat": (latitude.min() + latitude.max()) / 2, "lon": (longitude.min() + longitude.max()) / 2}
+    # Degrees spanned by the points, with a margin; a single point gets a town-level view
+    lon_span = max(longitude.max() - longitude.min(), 0.05) * 1.2
+    lat_span = max(latitude.max() - latitude.min(), 0.05) * 1.2 / np.cos(np.radians(center["lat"]))
+    zoom = min(np.log2(360 * width / 256 / lon_span), np.log2(360 * height / 256 / lat_span))
+    return center, float(np.clip(zoom, 0, 12))
+
+
+######################
+# Spatial index
+#
+# Towns are bucketed in a uniform latitude/longitude grid whose cells are at
+# least cell_km wide everywhere in the data. A radius query only computes
+# haversine distances to the towns of the cells around the query point; the
+# aggregates around every town at once work on per-cell sums instead.
+######################
+
+EARTH_RADIUS_KM = 6371.0088
+# Cells per radius of the index used for the neighbourhood aggregates of every town
+AREA_CELLS = 4
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km (broadcasts over numpy arrays)."""
+    lat1, lon1, lat2, lon2 = (np.radians(x) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+class SpatialIndex:
+    """Grid index answering radius and nearest-neighbour queries over towns."""
+
+    def __init__(self, latitude, longitude, cell_km=10):
+        self.latitude = np.asarray(latitude, dtype="float64")
+        self.longitude = np.asarray(longitude, dtype="float64")
+        self.cell_km = cell_km
+        self.lat0 = self.latitude.min()
+        self.lon0 = self.longitude.min()
+        self.cell_lat = cell_km / KM_PER_DEGREE
+        # Longitude cells are sized at the latitude furthest from the equator, where degrees are the shortest
+        max_lat = np.abs(self.latitude).max()
+        self.cell_lon = cell_km / (KM_PER_DEGREE * max(np.cos(np.radians(max_lat)), 1e-6))
+        self.n_cols = int((self.longitude.max() - self.lon0) // self.cell_lon) + 1
+
+        rows, cols = self.cell_of(self.latitude, self.longitude)
+        keys = rows * self.n_cols + cols
+        # Towns sorted by cell; each cell is a contiguous run of self.order
+        self.order = np.argsort(keys, kind="stable")
+        self.cell_keys, self.cell_starts, counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+        self.cell_ends = self.cell_starts + counts
+
+    def cell_of(self, latitude, longitude):
+        rows = np.floor((np.asarray(latitude) - self.lat0) / self.cell_lat).astype("int64")
+        cols = np.floor((np.asarray(longitude) - self.lon0) / self.cell_lon).astype("int64")
+        return rows, cols
+
+    def cells_around(self, row, col, radius_km):
+        """Indexes (in self.cell_keys) of the non-empty cells within radius_km of cell (row, col)."""
+        reach = int(np.ceil(radius_km / self.cell_km))
+        rows, cols = np.meshgrid(np.arange(row - reach, row + reach + 1), np.arange(col - reach, col + reach + 1), indexing="ij")
+        valid = (cols >= 0) & (cols < self.n_cols)
+        keys = (rows * self.n_cols + cols)[valid]
+        found = np.searchsorted(self.cell_keys, keys)
+        keep = found < len(self.cell_keys)
+        found, keys = found[keep], keys[keep]
+        # A key of an empty cell points to the next non-empty cell: keep exact matches only
+        return found[self.cell_keys[found] == keys]
+
+    def candidates(self, row, col, radius_km):
+        """Positions of the towns in the cells within radius_km of cell (row, col)."""
+        cells = self.cells_around(row, col, radius_km)
+        if not len(cells):
+            return np.empty(0, dtype="int64")
+        return np.concatenate([self.order[self.cell_starts[c]:self.cell_ends[c]] for c in cells])
+
+    def within(self, latitude, longitude, radius_km):
+        """Positions and distances of the towns within radius_km of a point, closest first."""
+        row, col = self.cell_of(latitude, longitude)
+        positions = self.candidates(row, col, radius_km)
+        distances = haversine_km(latitude, longitude, self.latitude[positions], self.longitude[positions])
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return positions[order], distances[order]
+
+    def nearest(self, latitude, longitude, k):
+        """Positions and distances of the k towns closest to a point."""
+        k = min(k, len(self.latitude))
+        radius_km = self.cell_km
+        while True:
+            positions, distances = self.within(latitude, longitude, radius_km)
+            # Every town closer than radius_km has been seen, so the k first are exact
+            if len(positions) >= k:
+                return positions[:k], distances[:k]
+            radius_km *= 2
+
+    def neighbourhood_sums(self, radius_km, values):
+        """For every town, the number of towns within about radius_km and the sums of values over them.
+
+        values is a (towns x columns) array; NaN count as 0. Towns are summed
+        per grid cell, then every cell adds up the cells whose centres are
+        within radius_km of its own centre, one vectorized pass per cell
+        offset. Distances are rounded to the cell, so the index should have
+        cells a few times smaller than radius_km (see AREA_CELLS).
+        """
+        n_towns, n_cells = len(self.latitude), len(self.cell_keys)
+        values = np.nan_to_num(np.asarray(values, dtype="float64").reshape(n_towns, -1))
+        cell_counts = self.cell_ends - self.cell_starts
+        town_cells = np.empty(n_towns, dtype="int64")
+        town_cells[self.order] = np.repeat(np.arange(n_cells), cell_counts)
+        cell_sums = np.column_stack([np.bincount(town_cells, weights=column, minlength=n_cells) for column in values.T])
+
+        rows, cols = self.cell_keys // self.n_cols, self.cell_keys % self.n_cols
+        center_lat = self.lat0 + (rows + 0.5) * self.cell_lat
+        center_lon = self.lon0 + (cols + 0.5) * self.cell_lon
+        counts = np.zeros(n_cells, dtype="int64")
+        sums = np.zeros_like(cell_sums)
+        reach = int(np.ceil(radius_km / self.cell_km))
+        for row_offset in range(-reach, reach + 1):
+            for col_offset in range(-reach, reach + 1):
+                target_cols = cols + col_offset
+                keys = (rows + row_offset) * self.n_cols + target_cols
+                found = np.minimum(np.searchsorted(self.cell_keys, keys), n_cells - 1)
+                sources = np.flatnonzero((target_cols >= 0) & (target_cols < self.n_cols) & (self.cell_keys[found] == keys))
+                targets = found[sources]
+                close = haversine_km(center_lat[sources], center_lon[sources], center_lat[targets], center_lon[targets]) <= radius_km
+                sources, targets = sources[close], targets[close]
+                counts[sources] += cell_counts[targets]
+                sums[sources] += cell_sums[targets]
+        return counts[town_cells], sums[town_cells]
+
+    def neighbourhood_aggregates(self, radius_km, weights, averaged, summed=None):
+        """Aggregates over the towns within radius_km of every town, in one batched pass.
+
+        Returns, per town: the number of towns around it, the sum of weights,
+        the weight-averaged columns of averaged (NaN ignored) and the sums of
+        the columns of summed (none if summed is None).
+        """
+        n = len(self.latitude)
+        weights = np.asarray(weights, dtype="float64")
+        averaged = np.asarray(averaged, dtype="float64").reshape(n, -1)
+        summed = np.empty((n, 0)) if summed is None else np.asarray(summed, dtype="float64").reshape(n, -1)
+        valid = ~np.isnan(averaged)
+        k = averaged.shape[1]
+        stacked = np.column_stack([weights, summed, np.where(valid, averaged * weights[:, None], 0), valid * weights[:, None]])
+
+        counts, sums = self.neighbourhood_sums(radius_km, stacked)
+        weighted, weight_counts = sums[:, -2 * k:-k], sums[:, -k:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = weighted / weight_counts
+        return counts, sums[:, 0], means, sums[:, 1:1 + summed.shape[1]]
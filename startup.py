@@ -0,0 +1,134 @@
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+
+import profiling
+from views import PAGES
+
+######################
+# Cold start
+#
+# prewarm() loads the dataset, builds the shared indexes, imports the page
+# modules and warms up plotly in a background thread, once per process: when
+# the server starts with serve.py, on the first run of the app otherwise.
+# Sessions asking for an object being built wait for it instead of building
+# it again. The prewarm steps and the first page shown by the process are
+# timed and logged as JSON lines on the "dv.profile" logger. DV_PREWARM=0
+# turns the prewarm off.
+######################
+
+# Shared objects built by prewarm(), in order (functions of shared.py)
+PREWARM_STEPS = ["load_data", "load_query_engine", "load_town_index", "load_figure_cache", "load_cube", "load_spatial_index", "load_inequality_metrics"]
+
+# Seconds the prewarm waits for the Streamlit runtime before going on without it
+RUNTIME_WAIT = 10
+
+# Threads of the app that call the shared caches outside of any session (prewarm, reload.py's watcher)
+BACKGROUND_THREADS = {"dv-prewarm", "dv-reload"}
+
+
+class _BackgroundThreadFilter(logging.Filter):
+    """Drops Streamlit's "missing ScriptRunContext" warning for the background threads of the app.
+
+    Those threads have no session by design: they only fill or evict the
+    process-wide caches, which need none. Logged at every server start, the
+    warning would read like an error.
+    """
+
+    def filter(self, record):
+        return record.threadName not in BACKGROUND_THREADS or "missing ScriptRunContext" not in record.getMessage()
+
+
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_BackgroundThreadFilter())
+
+_IMPORTED = time.time()
+_lock = threading.Lock()
+_done = set()
+
+
+def _once(name):
+    """True the first time it is called with name in this process."""
+    with _lock:
+        if name in _done:
+            return False
+        _done.add(name)
+        return True
+
+
+def process_start():
+    """Wall-clock time at which the process started (Linux), or when this module was imported."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22, counted after the command name which may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED
+
+
+def since_start_ms():
+    return round((time.time() - process_start()) * 1000, 1)
+
+
+def warm_plotly():
+    """Builds and serializes a tiny figure of each kind the pages draw: plotly loads its validators on first use."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    figures = [
+        px.scatter_mapbox(lat=[46.0], lon=[2.0], hover_name=["town"], color=[1.0], size=[1]),
+        go.Figure([go.Bar(x=["a"], y=[1]), go.Box(y=[1]), go.Violin(y=[1]), go.Scatter(x=[1], y=[1]), go.Heatmap(z=[[1]])]),
+    ]
+    for fig in figures:
+        fig.update_layout(mapbox_style="carto-positron")
+        fig.to_json()
+
+
+def _prewarm(wait_for_runtime):
+    from streamlit import runtime
+
+    steps = {}
+    start = time.perf_counter()
+    # Started with the server, wait for its runtime so that the caches of
+    # shared.py are created within it
+    while wait_for_runtime and not runtime.exists() and time.perf_counter() - start < RUNTIME_WAIT:
+        time.sleep(0.05)
+    try:
+        step = time.perf_counter()
+        import shared
+        steps["import shared"] = round((time.perf_counter() - step) * 1000, 1)
+        for name in PREWARM_STEPS:
+            step = time.perf_counter()
+            getattr(shared, name)()
+            steps[name] = round((time.perf_counter() - step) * 1000, 1)
+        for module, _ in PAGES.values():
+            step = time.perf_counter()
+            importlib.import_module(module)
+            steps[f"import {module}"] = round((time.perf_counter() - step) * 1000, 1)
+        step = time.perf_counter()
+        warm_plotly()
+        steps["plotly figures"] = round((time.perf_counter() - step) * 1000, 1)
+    except Exception as error:
+        # The pages build what is missing on demand
+        profiling.logger.exception("Prewarm failed: %s", error)
+    profiling.logger.info(json.dumps({"startup": "prewarm", "ms": round((time.perf_counter() - start) * 1000, 1), "since_process_start_ms": since_start_ms(), "steps": steps}))
+
+
+def prewarm(wait_for_runtime=False):
+    """Starts filling the shared caches in a background thread, once per process; returns the thread (None if not started)."""
+    if os.environ.get("DV_PREWARM", "1") == "0" or not _once("prewarm"):
+        return None
+    thread = threading.Thread(target=_prewarm, args=(wait_for_runtime,), name="dv-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def first_render(page):
+    """Logs the time from the process start to the end of its first rerun."""
+    if _once("first render"):
+        profiling.logger.info(json.dumps({"startup": "first render", "page": page, "since_process_start_ms": since_start_ms()}, ensure_ascii=False))
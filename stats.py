@@ -0,0 +1,175 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+######################
+# Distribution summaries
+#
+# Box and violin plots are drawn from these summaries instead of the raw
+# values, so the size of a figure does not grow with the number of towns.
+######################
+
+# Points of each KDE curve and bins used to estimate it
+KDE_POINTS = 100
+KDE_BINS = 512
+# Most extreme outliers kept per group
+MAX_OUTLIERS = 200
+
+
+def calculate_outlier_bounds(values):
+    """Calculates IQR and outlier bounds for a data column."""
+    q1, q3 = np.nanquantile(values, [0.25, 0.75])
+    iqr = q3 - q1
+    lower_bound = q1 - (1.5 * iqr)
+    upper_bound = q3 + (1.5 * iqr)
+    return lower_bound, upper_bound
+
+
+def box_summary(values, labels=None):
+    """Quartiles, whiskers and outliers of values (NaN are ignored).
+
+    labels (e.g. town names) are aligned with values and returned with the
+    outliers. Whiskers end at the furthest values inside the 1.5 IQR bounds,
+    like plotly's own box plots.
+    """
+    values = np.asarray(values, dtype="float64")
+    valid = ~np.isnan(values)
+    values = values[valid]
+    if labels is not None:
+        labels = np.asarray(labels, dtype=object)[valid]
+    if not len(values):
+        return None
+
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    lower_bound, upper_bound = calculate_outlier_bounds(values)
+    inside = (values >= lower_bound) & (values <= upper_bound)
+
+    outliers = np.flatnonzero(~inside)
+    if len(outliers) > MAX_OUTLIERS:
+        distance = np.maximum(lower_bound - values[outliers], values[outliers] - upper_bound)
+        outliers = outliers[np.argsort(distance)[-MAX_OUTLIERS:]]
+
+    return {
+        "count": len(values),
+        "mean": values.mean(),
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lowerfence": values[inside].min(),
+        "upperfence": values[inside].max(),
+        "lower_bound": lower_bound,
+        "upper_bound": upper_bound,
+        "min": values.min(),
+        "max": values.max(),
+        "outliers": values[outliers],
+        "outlier_labels": None if labels is None else labels[outliers],
+    }
+
+
+def kde_curve(values, points=KDE_POINTS, bins=KDE_BINS):
+    """Gaussian kernel density of values, evaluated on `points` values.
+
+    The values are first binned, so the cost does not depend on their number.
+    The bandwidth follows Silverman's rule of thumb, as in plotly's violins.
+    """
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n < 2 or values.min() == values.max():
+        return None
+
+    bandwidth = 1.059 * min(values.std(), (np.quantile(values, 0.75) - np.quantile(values, 0.25)) / 1.34) * n ** (-1 / 5)
+    if bandwidth <= 0:
+        bandwidth = 1.059 * values.std() * n ** (-1 / 5)
+    counts, edges = np.histogram(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    # Same span as plotly's "soft" mode: two bandwidths past the extreme values
+    grid = np.linspace(values.min() - 2 * bandwidth, values.max() + 2 * bandwidth, points)
+    kernel = np.exp(-0.5 * ((grid[:, None] - centers[None, :]) / bandwidth) ** 2)
+    density = kernel @ counts / (n * bandwidth * np.sqrt(2 * np.pi))
+    return {"y": grid, "density": density}
+
+
+######################
+# Figures from summaries
+######################
+
+def add_summary_box(fig, summary, x, color, width=None, showlegend=True):
+    """Adds a box drawn from precomputed quartiles and whiskers at position x."""
+    fig.add_trace(go.Box(
+        x=[x],
+        q1=[summary["q1"]],
+        median=[summary["median"]],
+        q3=[summary["q3"]],
+        lowerfence=[summary["lowerfence"]],
+        upperfence=[summary["upperfence"]],
+        mean=[summary["mean"]],
+        name=summary["name"],
+        legendgroup=summary["name"],
+        marker_color=color,
+        width=width,
+        showlegend=showlegend,
+        boxpoints=False,
+    ))
+
+
+def add_outliers(fig, summary, x, color):
+    """Adds the outliers of a summary as markers at position x, labelled on hover."""
+    if not len(summary["outliers"]):
+        return
+    fig.add_trace(go.Scatter(
+        x=[x] * len(summary["outliers"]),
+        y=summary["outliers"],
+        hovertext=summary["outlier_labels"],
+        mode="markers",
+        marker=dict(color=color, size=4),
+        name=summary["name"],
+        legendgroup=summary["name"],
+        showlegend=False,
+    ))
+
+
+def box_figure(summaries, y_title, show_outliers=True):
+    """Box plot with one box per summary."""
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, summary in enumerate(summaries):
+        add_summary_box(fig, summary, summary["name"], colors[i % len(colors)], showlegend=False)
+        if show_outliers:
+            add_outliers(fig, summary, summary["name"], colors[i % len(colors)])
+    fig.update_layout(yaxis_title=y_title)
+    return fig
+
+
+def violin_figure(summaries, y_title, legend_title, show_box=True, title=None):
+    """Violin plot with one violin (mirrored KDE curve) per summary."""
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, summary in enumerate(summaries):
+        color = colors[i % len(colors)]
+        kde = summary.get("kde")
+        if kde is not None:
+            # Every violin gets the same maximum width, like plotly's scalemode="width"
+            half_width = 0.4 * kde["density"] / kde["density"].max()
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([i - half_width, (i + half_width)[::-1]]),
+                y=np.concatenate([kde["y"], kde["y"][::-1]]),
+                fill="toself",
+                mode="lines",
+                line=dict(color=color, width=1),
+                name=summary["name"],
+                legendgroup=summary["name"],
+                hoverinfo="skip",
+            ))
+        if show_box:
+            add_summary_box(fig, summary, i, color, width=0.1, showlegend=kde is None)
+        add_outliers(fig, summary, i, color)
+
+    fig.update_layout(
+        title=title,
+        yaxis_title=y_title,
+        legend_title_text=legend_title,
+        xaxis=dict(tickmode="array", tickvals=list(range(len(summaries))), ticktext=[s["name"] for s in summaries]),
+    )
+    return fig
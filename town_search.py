@@ -0,0 +1,82 @@
+import bisect
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+######################
+# Town search
+#
+# Town names are folded (lower case, no accents, no hyphens or apostrophes)
+# and indexed twice: sorted, for prefix matches with binary search, and by
+# trigram, for approximate matches ("st etienne", "besancon", typos).
+# Results are dataset positions, so homonyms in different departements stay
+# distinct.
+######################
+
+
+def fold(text):
+    """Lower case, accents removed, punctuation turned into single spaces: "Saint-Étienne" -> "saint etienne"."""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def trigrams(folded):
+    """Trigrams of a folded name, padded so that word starts weigh more."""
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TownIndex:
+    """Prefix and trigram index over the town names of the dataset."""
+
+    def __init__(self, data):
+        towns = data["Town"].astype(str).to_numpy()
+        departements = data["Departement"].astype(str).str.strip().to_numpy()
+        codes = data["CODGEO"].astype(str).to_numpy()
+        self.populations = data["total_population"].to_numpy()
+
+        # "Town (dep) Departement", plus the INSEE code if that is still ambiguous
+        labels = [f"{town} {departement}" for town, departement in zip(towns, departements)]
+        repeated = Counter(labels)
+        self.labels = [f"{label} - {code}" if repeated[label] > 1 else label for label, code in zip(labels, codes)]
+
+        self.folded = [fold(town) for town in towns]
+        self.sorted_names = sorted((name, position) for position, name in enumerate(self.folded))
+        self.sorted_keys = [name for name, _ in self.sorted_names]
+
+        postings = {}
+        for position, name in enumerate(self.folded):
+            for trigram in trigrams(name):
+                postings.setdefault(trigram, []).append(position)
+        self.postings = {trigram: np.array(positions, dtype="int32") for trigram, positions in postings.items()}
+        self.trigram_counts = np.array([len(trigrams(name)) for name in self.folded], dtype="int32")
+
+    def prefix(self, folded_query):
+        """Positions of the towns whose folded name starts with folded_query."""
+        start = bisect.bisect_left(self.sorted_keys, folded_query)
+        stop = bisect.bisect_left(self.sorted_keys, folded_query + "\uffff")
+        return [position for _, position in self.sorted_names[start:stop]]
+
+    def search(self, query, k=20):
+        """Positions of the k best matches: prefix matches by decreasing population, then the closest names by trigram similarity."""
+        folded_query = fold(query)
+        if not folded_query:
+            return []
+
+        prefix_matches = sorted(self.prefix(folded_query), key=lambda position: (self.folded[position] != folded_query, -self.populations[position]))
+        results = prefix_matches[:k]
+        if len(results) == k:
+            return results
+
+        query_trigrams = [t for t in trigrams(folded_query) if t in self.postings]
+        if not query_trigrams:
+            return results
+        # Number of trigrams shared with the query, for every town at once
+        shared = np.bincount(np.concatenate([self.postings[t] for t in query_trigrams]), minlength=len(self.folded))
+        similarity = shared / (len(trigrams(folded_query)) + self.trigram_counts - shared)
+        similarity[results] = 0
+        candidates = np.flatnonzero(similarity >= 0.3)
+        best = candidates[np.lexsort((-self.populations[candidates], -similarity[candidates]))]
+        return results + best[:k - len(results)].tolist()
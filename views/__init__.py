@@ -0,0 +1,16 @@
+######################
+# Pages of the app
+#
+# One module per page. main_page.py only imports the module of the page
+# being shown, so a page and the plotting libraries it uses are loaded the
+# first time someone opens it.
+######################
+
+# Sidebar label -> (module, function drawing the page)
+PAGES = {
+    "Map overview": ("views.map_overview", "Main_page"),
+    "Understanding Salary Inequalities": ("views.inequalities", "Ineq_page"),
+    "Comparision of up to 3 cities": ("views.comparison", "City_comparison"),
+    "Inequality rankings": ("views.rankings", "Ranking_page"),
+    "Definitions and Methodology": ("views.definitions", "Definitions"),
+}
@@ -0,0 +1,217 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+import shared
+import reshape
+import spatial
+import profiling
+import presentation
+
+######################
+# Comparison of towns
+######################
+
+# Number of matches proposed by each town selector
+TOWN_MATCHES = 20
+# Above this number of towns the comparison is drawn as a heatmap instead of bars
+MAX_BAR_TOWNS = 30
+# Towns of a cohort, to bound what each session keeps between reruns
+MAX_COHORT_TOWNS = 2000
+
+def comparison_figures(positions, segmentation, town_labels):
+    """Shows the salaries of the towns at positions for a segmentation, then the towns on a map."""
+    data = shared.load_data()
+    positions = list(positions)
+
+    def build_comparison():
+        """Bars (one trace per segment) for a few towns, a heatmap for a cohort."""
+        segments, matrix = reshape.segment_matrix(data, positions, segmentation)
+        if len(positions) <= MAX_BAR_TOWNS:
+            fig = go.Figure(data=[go.Bar(x=town_labels, y=matrix[:, j], name=segment) for j, segment in enumerate(segments)])
+            # Update layout with axis titles
+            fig.update_layout(
+                xaxis_title="Town",  # Title for the x-axis
+                yaxis_title="Mean Net Salary (€)"  # Title for the y-axis
+            )
+        else:
+            fig = go.Figure(data=go.Heatmap(z=matrix, x=segments, y=town_labels, colorbar_title="€ / hour", hovertemplate="%{y}<br>%{x}: %{z:.1f} €<extra></extra>"))
+            fig.update_layout(height=max(400, 18 * len(positions)), yaxis_autorange="reversed")
+        return fig
+
+    shared.show_figure(("comparison", positions, segmentation), build_comparison)
+    if len(positions) <= MAX_BAR_TOWNS:
+        st.write('This bar chart shows the mean salary per hour in EUR for the selected towns. The chart is segmented by the selected category. The chart allows you to compare the mean salary per hour for different towns based on the selected category.')
+    else:
+        st.write('With many towns, each row of this heatmap is a town and each column a segment of the selected category; the color gives the mean salary per hour in EUR.')
+    st.write('Interpretation: The chart reveals the mean salary per hour for the selected towns based on the selected category. You can see the differences in mean salary per hour for different towns based on the selected category.')
+
+    st.subheader("Locate the towns on the map")
+    def build_town_map():
+        """Map of the selected towns."""
+        # Create a scatter plot to show the selected towns on the map
+        fig_2 = px.scatter_mapbox(shared.rows(positions, ["latitude", "longitude", "mean_salary"]),
+                                lat="latitude",
+                                lon="longitude",
+                                hover_name=town_labels,
+                                hover_data={"mean_salary": ":.1f", "latitude": False, "longitude": False},
+                                labels=presentation.COLUMN_NAMES,
+                                zoom=5,
+                                size=np.full(len(positions), 3),
+                                )
+
+        fig_2.update_layout(mapbox_style="carto-positron", height=950, width=710)
+
+        return fig_2
+
+    shared.show_figure(("comparison_map", positions), build_town_map)
+
+# Nearest towns listed around the town of the commuting area mode
+NEAREST_TOWNS = 10
+
+def commuting_area(center, radius_km, segmentation, town_index):
+    """Compares a town with the towns within radius_km of it, weighted by population."""
+    data = shared.load_data()
+    with profiling.stage("spatial query") as record:
+        latitude, longitude = data["latitude"].iloc[center], data["longitude"].iloc[center]
+        positions, _ = shared.load_spatial_index().within(latitude, longitude, radius_km)
+        nearest, distances = shared.load_spatial_index().nearest(latitude, longitude, NEAREST_TOWNS + 1)
+        record["rows"] = len(positions)
+    # Population-weighted means of the towns of the area, NaN salaries left out
+    columns = ["mean_salary"] + list(reshape.SEGMENTATIONS[segmentation].values())
+    salaries = data[columns].to_numpy(dtype="float64")[positions]
+    weights = np.where(np.isnan(salaries), 0, data["total_population"].to_numpy(dtype="float64")[positions, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        area = pd.Series(np.nansum(salaries * weights, axis=0) / weights.sum(axis=0), index=columns)
+    area["towns"] = len(positions)
+    area["total_population"] = data["total_population"].to_numpy()[positions].sum()
+    area["total_firms"] = data["total_firms"].to_numpy()[positions].sum()
+    with profiling.stage("commuting areas"):
+        # Share of the commuting areas of all the towns (approximated on a grid) with a lower mean salary
+        percentile = shared.area_salary_rank(area["mean_salary"], radius_km)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Towns in the area", int(area["towns"]))
+    col2.metric("Population of the area", f"{int(area['total_population']):,}")
+    col3.metric("Firms in the area", f"{int(area['total_firms']):,}")
+    st.write(f"The mean salary of the area is {area['mean_salary']:.1f} € per hour (weighted by population), higher than in {percentile:.0f}% of the {radius_km} km areas of the French towns.")
+
+    def build_area_comparison():
+        """Bars of the town and of its area for each segment."""
+        segments, matrix = reshape.segment_matrix(data, [center], segmentation)
+        fig = go.Figure(data=[
+            go.Bar(x=segments, y=matrix[0], name=town_index.labels[center]),
+            go.Bar(x=segments, y=area[columns[1:]].to_numpy(dtype="float64"), name=f"Within {radius_km} km"),
+        ])
+        fig.update_layout(xaxis_title=segmentation, yaxis_title="Mean Net Salary (€)")
+        return fig
+
+    shared.show_figure(("commuting area", center, radius_km, segmentation), build_area_comparison)
+
+    st.write(f"Closest towns to {town_index.labels[center]}:")
+    others = nearest != center
+    nearest_towns = presentation.for_display(shared.rows(nearest[others][:NEAREST_TOWNS], ["Town", "total_population", "mean_salary"]).round(1))
+    nearest_towns.insert(1, "Distance (km)", distances[others][:NEAREST_TOWNS].round(1))
+    st.dataframe(nearest_towns, hide_index=True)
+
+    st.subheader("Locate the towns on the map")
+    def build_area_map():
+        """Map of the towns of the area, colored by mean salary."""
+        fig = px.scatter_mapbox(shared.rows(positions, ["Town", "latitude", "longitude", "mean_salary", "total_population"]),
+                                lat="latitude",
+                                lon="longitude",
+                                hover_name="Town",
+                                hover_data={"mean_salary": ":.1f", "total_population": True, "latitude": False, "longitude": False},
+                                color="mean_salary",
+                                labels=presentation.COLUMN_NAMES,
+                                )
+        center_point, zoom = spatial.view_for_points(data["latitude"].to_numpy()[positions], data["longitude"].to_numpy()[positions])
+        fig.update_layout(mapbox_style="carto-positron", mapbox_center=center_point, mapbox_zoom=zoom, height=950, width=710)
+        return fig
+
+    shared.show_figure(("commuting area map", center, radius_km), build_area_map)
+
+def City_comparison():
+    data = shared.get_data()
+    st.title("Comparision of up to 3 cities")
+    st.write("Here we will compare up to 3 cities in France based on the mean salary per hour. You can select the segmentation you want between the socio-professional category, the gender and the age")
+    st.write("To compare more towns, for example every town of a departement, choose the cohort mode. To compare a town with the towns around it, choose the commuting area mode.")
+
+    town_index = shared.load_town_index()
+    mode = st.radio("Comparison mode", ["Up to 3 towns", "Cohort of towns", "Commuting area"], horizontal=True)
+
+    if mode == "Commuting area":
+        st.write("The commuting area of a town gathers every town within the chosen distance of it. Its salaries are the means of the towns of the area weighted by their population.")
+        matches = town_index.search(st.text_input("Search the central town:", value="Grenoble"), k=TOWN_MATCHES)
+        center = st.selectbox("Central town", options=matches, format_func=lambda position: town_index.labels[position])
+        radius_km = st.slider("Radius of the commuting area (km)", min_value=5, max_value=50, value=20, step=5)
+        segmentation = st.selectbox("Select segmentation :", options=list(reshape.SEGMENTATIONS), index=0)
+        if center is None:
+            st.write("Select a town.")
+            return
+        commuting_area(center, radius_km, segmentation, town_index)
+        return
+
+    if mode == "Up to 3 towns":
+        st.write('Type the beginning of a town name (accents are optional), then pick the town among the matches. If you want to compare only 2 cities, select "None" for the third city.')
+
+        def town_selector(label, default_query):
+            """Search box and the selectbox of its best matches; returns the dataset position of the town (or None)."""
+            query = st.text_input(f"Search {label}:", value=default_query)
+            matches = town_index.search(query, k=TOWN_MATCHES)
+            return st.selectbox(f"Select {label}:", options=[None] + matches, index=1 if matches else 0, format_func=lambda position: "None" if position is None else town_index.labels[position])
+
+        #Default towns : Paris, Grenoble
+        town_filter_1 = town_selector("First Town", "Paris")
+        town_filter_2 = town_selector("Second Town", "Grenoble")
+        town_filter_3 = town_selector("Third Town", "")
+        selected = sorted({town for town in [town_filter_1, town_filter_2, town_filter_3] if town is not None})
+
+    elif mode == "Cohort of towns":
+        st.write("Add every town of a departement, or search towns one by one. Remove towns from the cohort in the list below.")
+        # CODGEO of the towns of the cohort, kept between reruns: positions change when the dataset is reloaded
+        cohort = st.session_state.setdefault("cohort", [])
+        # Dataset positions of the cohort for this rerun, without the towns no longer in the dataset
+        positions = shared.town_positions(cohort)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            departement = st.selectbox("Departement", options=shared.load_cube().departements())
+            if st.button("Add every town of the departement"):
+                with profiling.stage("filtering") as record:
+                    towns = np.flatnonzero((data["Departement"] == departement).to_numpy())
+                    record["rows"] = len(towns)
+                known = set(positions)
+                positions.extend(town for town in towns.tolist()[:MAX_COHORT_TOWNS - len(positions)] if town not in known)
+        with col2:
+            matches = town_index.search(st.text_input("Search a town:"), k=TOWN_MATCHES)
+            town = st.selectbox("Matches", options=matches, format_func=lambda position: town_index.labels[position])
+            if st.button("Add the town") and town is not None and town not in positions and len(positions) < MAX_COHORT_TOWNS:
+                positions.append(town)
+
+        positions = st.multiselect("Cohort", options=list(positions), default=list(positions), format_func=lambda position: town_index.labels[position])
+        if st.button("Clear the cohort"):
+            positions = []
+        cohort[:] = data["CODGEO"].to_numpy()[positions].tolist()
+        if len(positions) >= MAX_COHORT_TOWNS:
+            st.write(f"The cohort is limited to {MAX_COHORT_TOWNS} towns.")
+        selected = positions
+
+    if not selected:
+        st.write("Select at least one town.")
+        return
+
+    # Town names on the charts, with the departement for homonyms
+    names = data["Town"].to_numpy()[selected]
+    town_labels = [town_index.labels[position] for position in selected] if len(set(names)) < len(names) else names.tolist()
+
+    # Create a bar chart to compare the mean salary per hour of the selected towns
+    st.subheader("Comparing caracteristics of those towns:")
+    possible_options = list(reshape.SEGMENTATIONS)
+    filter= st.selectbox("Select segmentation :", options=possible_options, index=0)
+
+    comparison_figures(selected, filter, town_labels)
+    if mode == "Up to 3 towns":
+        st.write('Try exploring by comparing Paris and Marseille, the two most populated cities. You can see that Marseille has a lower mean salary per hour compared to Paris. This is due to the difference in the cost of living between the two cities. Paris is known for its high cost of living, which is reflected in the higher mean salary per hour compared to Marseille.')
@@ -0,0 +1,26 @@
+import streamlit as st
+
+######################
+# Definitions and methodology
+######################
+
+def Definitions():
+    st.title("Definitions and Methodology")
+    st.subheader("Methodology")
+    st.write("The data used in this visualization was obtained from this Kaggle dataset : https://www.kaggle.com/datasets/etiennelq/french-employment-by-town/data")
+    st.write("The dataset contains information about the town, salaries and population in France in multiple files. During the preprocessing, we merged those files and renamed the columns to make the data readable.")
+    st.write("For example, the column 'SNHMFC14', which represents the mean net salary per hour for feminin executive according to the dataset, was renamed mean_female_executive_salary.")
+    st.write("We took the preprocessing on this link : https://www.kaggle.com/code/dirkxie/data-preparation and we modified it to obtain more precise information for each town about the region, the departement, the population.")
+    st.write("At the end of the preprocessing, we get a single dataset with one line per town and information for each segmentation of the population.")
+    st.write("Original datasets are heavy so we put only the preprocessed data in the github repository. The original data can be found in the Kaggle dataset.")
+    st.write("The preprocessing can be run again from the original files with etl.py in the repository: it joins the files on the town code (CODGEO), sums the population of each town and groups the firms by size (micro : 1-9 employees, small : 10-49, medium : 50-199, large : 200 and more). Towns without coordinates and the towns of Corsica, whose codes are not numbers, are left out.")
+
+    st.write("Our Github link : https://github.com/theveneth/DV_project ")
+
+
+    st.subheader("Definitions")
+
+    st.write("AGES : ")
+    st.write("- Young : 18-25 years old")
+    st.write("- Medium : 26-50 years old")
+    st.write("- Old : 51 years old and above")
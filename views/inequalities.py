@@ -0,0 +1,73 @@
+import streamlit as st
+
+import shared
+import reshape
+import stats
+import profiling
+
+######################
+# Salary inequalities
+######################
+
+def Ineq_page():
+    with profiling.stage("reshaping: cube"):
+        salary_cube = shared.load_cube()
+
+    st.title("Understanding Salary Inequalities in France")
+    st.write("Here we will focus not only on the spatial repartion but also on the segmentation of the population by socio-professional categories, age groups and gender.")
+
+    #Violin plot between male and female in france
+    st.subheader("Violin plot of the mean salary per hour by gender")
+
+    # Filter by region, then by the departements of that region
+    region_options = ["All"] + salary_cube.regions  # Add "All" option
+    region_filter= st.selectbox("Select Region Name", options=region_options, index=0)
+    departement_options = ["All"] + salary_cube.departements(region_filter)  # Add "All" option
+    departement_filter= st.selectbox("Select Departement", options=departement_options, index=0)
+    
+    category_options = ["All"] + reshape.CATEGORIES  # Add "All" option
+    category_filter = st.selectbox("Select Category", options=category_options, index=0)
+
+    boxes_1 = st.checkbox("Show box plot on top of violin plot", value=True)
+
+    # Violins drawn from the distribution of each gender in the selection
+    def build_gender_violins():
+        with profiling.stage("summaries"):
+            summaries_2 = shared.cube_summaries("gender", reshape.GENDERS, region_filter, departement_filter, category=category_filter)
+        return stats.violin_figure(summaries_2, reshape.SALARY_LABEL, "Gender", show_box=boxes_1)
+
+    shared.show_figure(("gender violins", region_filter, departement_filter, category_filter, boxes_1), build_gender_violins)
+    st.write("Number of towns, mean, population-weighted mean and quartiles of the mean salary per hour (€) in the selection:")
+    st.dataframe(salary_cube.table("gender", reshape.GENDERS, region_filter, departement_filter, category=category_filter).round(2), hide_index=True)
+    
+    
+    st.write("Here, we can see the distribution of the mean salary per hour in different towns across France. The violin plot shows the distribution of the mean hourly salary in EUR.")
+    st.write("Interpretation: We can see that the mean salary is generally higher for men than for women.")
+    st.write("Try exploring other departments and socio-professional categories. You will notice that we cannot generalize the situation for every region in France. There are many inequalities, and each region faces its own difficulties.")
+
+
+    ###
+    # AGE
+    ###
+    st.subheader("Violin plot of the mean salary per age")
+
+    # Filter by region, then by the departements of that region
+    region_options_2 = ["All"] + salary_cube.regions  # Add "All" option
+    region_filter_2= st.selectbox("Select Region Name :", options=region_options_2, index=0)
+    departement_options_2 = ["All"] + salary_cube.departements(region_filter_2)  # Add "All" option
+    departement_filter_2= st.selectbox("Select Departement :", options=departement_options_2, index=0)
+    
+    boxes_2 = st.checkbox("Show box plot on top of violin plot ", value=True)
+
+    # Violins drawn from the distribution of each age group in the selection
+    def build_age_violins():
+        with profiling.stage("summaries"):
+            summaries_3 = shared.cube_summaries("age", reshape.AGES, region_filter_2, departement_filter_2)
+        return stats.violin_figure(summaries_3, reshape.SALARY_LABEL, "Age", show_box=boxes_2, title="Mean Salary per Hour by Age Group and Town")
+
+    shared.show_figure(("age violins", region_filter_2, departement_filter_2, boxes_2), build_age_violins)
+    st.dataframe(salary_cube.table("age", reshape.AGES, region_filter_2, departement_filter_2).round(2), hide_index=True)
+
+    st.write("This box plot shows the distribution of mean hourly salary (€) across different age groups in French towns. We can observe a general trend of higher salaries for older age groups.")
+    st.write("Interpretation: The plot reveals age-based salary inequalities within each region and across France as a whole. For a more detailed view, try selecting the 'Île-de-France' region to see how these inequalities manifest within that specific area.")
+    # Optional customizations (adjust as needed)
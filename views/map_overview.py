@@ -0,0 +1,160 @@
+import streamlit as st
+import plotly.express as px
+
+import shared
+import spatial
+import stats
+import profiling
+import presentation
+
+######################
+# Map overview
+######################
+
+# Columns of the towns shown on the map overview
+MAP_COLUMNS = ["Town", "latitude", "longitude", "mean_salary", "total_firms"]
+# Above this number of towns the map shows clusters (in "Automatic" detail) or towns without hover data
+MAX_MAP_TOWNS = 5000
+
+def Main_page():
+    data = shared.get_data()
+    with profiling.stage("indexes"):
+        engine = shared.load_query_engine()
+
+    st.title("Salary insights and statistics in France")
+    st.write("INSEE is the official french institute gathering data of many types around France\n.It can be demographic (Births, Deaths, Population Density…), Economic (Salary, Firms by activity / size…) and more. \n It can be a great help to observe and measure inequality in the French population.")
+
+    st.write("In this visualization, we focus on displaying spatial information about the population, the mean salary and the number of firms in different towns in France.")
+
+    st.subheader("Interactive map of France")
+    st.write("Here we can see an interactive map of France. The map shows the towns in France with the mean salary per hour and the total number of firms. The map is interactive, so you can zoom in and out and hover over the towns to see more information about them. You can also filter the data based on the total population and the mean salary per hour using the sliders.")
+    st.write("When many towns are selected, nearby towns are grouped into clusters showing their number and mean salary. Zoom on a region to see its individual towns.")
+    # Add sliders for total_population and mean_salary
+    min_data_population, max_data_population = engine.bounds("total_population")
+    min_data_salary, max_data_salary = engine.bounds("mean_salary")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        min_population = st.number_input(f"Minimum Population (above {min_data_population})", value=min_data_population, min_value=min_data_population, key="min_input")
+    with col2:
+        max_population = st.number_input(f"Maximum Population (below {max_data_population})", value=max_data_population, min_value=min_data_population, key="max_input")
+
+    min_salary, max_salary = st.slider("Select mean salary range", min_value=min_data_salary, max_value=max_data_salary, value=(min_data_salary, max_data_salary))
+
+    
+    # Filter the data based on the slider values
+    col3, col4 = st.columns(2)
+    with col3:
+        map_detail = st.selectbox("Map detail", options=["Automatic", "Town clusters", "Individual towns"], index=0)
+    with col4:
+        region_focus = st.selectbox("Zoom on region", options=["All"] + data["nom_région"].cat.categories.tolist(), index=0)
+
+    def build_map():
+        """Map of the towns (or clusters of towns) matching the filters."""
+        with profiling.stage("filtering") as record:
+            positions = engine.query({"total_population": (min_population, max_population), "mean_salary": (min_salary, max_salary)})
+            if region_focus != "All":
+                positions = positions[data["nom_région"].to_numpy()[positions] == region_focus]
+            filtered_data = shared.rows(positions, MAP_COLUMNS)
+            record["rows"] = len(filtered_data)
+
+        # National view at zoom 5, or fitted to the towns of the selected region
+        center, zoom = None, 5
+        if region_focus != "All" and len(filtered_data):
+            center, zoom = spatial.view_for_points(filtered_data["latitude"], filtered_data["longitude"])
+
+        show_clusters = map_detail == "Town clusters" or (map_detail == "Automatic" and len(filtered_data) > MAX_MAP_TOWNS)
+        if show_clusters:
+            # One point per grid cell of about the on-screen size of a marker
+            clusters = spatial.grid_clusters(filtered_data["latitude"], filtered_data["longitude"], filtered_data["mean_salary"], spatial.cell_size_for_zoom(zoom))
+            fig = px.scatter_mapbox(clusters,
+                                    lat="latitude",
+                                    lon="longitude",
+                                    size="towns",
+                                    color="mean_value",
+                                    hover_data={"towns": True, "mean_value": ":.1f", "latitude": False, "longitude": False},
+                                    labels={"towns": "Towns", "mean_value": "Mean net salary per hour (€)"},
+                                    zoom=zoom,
+                                    center=center,
+                                    )
+        elif len(filtered_data) > MAX_MAP_TOWNS:
+            # Many individual points: keep only the town name in the hover to limit the payload
+            fig = px.scatter_mapbox(filtered_data,
+                                    lat="latitude",
+                                    lon="longitude",
+                                    hover_name="Town",
+                                    hover_data={"latitude": False, "longitude": False},
+                                    zoom=zoom,
+                                    center=center,
+                                    )
+        else:
+            fig = px.scatter_mapbox(filtered_data, 
+                                    lat="latitude",
+                                    lon="longitude",
+                                    hover_name="Town", 
+                                    hover_data={"mean_salary": ":.1f", "total_firms": True},
+                                    labels=presentation.COLUMN_NAMES,
+                                    zoom=zoom,
+                                    center=center,
+                                    )
+
+        fig.update_layout(mapbox_style="carto-positron", height=950, width=710)
+        return fig
+
+    shared.show_figure(("map", min_population, max_population, min_salary, max_salary, map_detail, region_focus), build_map)
+
+    def create_box_plot(data_column, show_outliers, use_log_axis=False):
+        """Creates a box plot with optional outlier visibility and log axis."""
+        summary = shared.column_summary(data_column)
+        box = stats.box_figure([summary], presentation.COLUMN_NAMES[data_column], show_outliers=show_outliers)
+
+        if not show_outliers:
+            lower_bound, upper_bound = summary["lower_bound"], summary["upper_bound"]
+            box.update_layout(yaxis_range=[lower_bound, upper_bound])
+            use_log_axis=False
+
+        if use_log_axis:
+            box.update_layout(yaxis_type="log")  # Set y-axis to log scale
+
+        if not show_outliers and use_log_axis:
+            # Adjust y-axis range for log scale when hiding outliers
+            box.update_layout(yaxis_range=[max(lower_bound, 1), upper_bound])  # Set minimum to 1 for log
+
+        return box
+
+    # Create checkboxes for outlier visibility
+    
+    
+
+    # Create and display box plots with outlier control
+    st.subheader("Mean Salary by cities Distribution")
+
+    show_salary_outliers = st.checkbox("Show outliers for Mean Salary", value=True)
+    
+
+    shared.show_figure(("salary box", show_salary_outliers), lambda: create_box_plot("mean_salary", show_salary_outliers))
+
+    
+    #salary_box = px.box(pd.DataFrame(data_copy[["Town","Mean net salary per hour (€)"]]), y="Mean net salary per hour (€)", hover_name = "Town")
+    #population_box = px.box(pd.DataFrame(data_copy[["Town", "Total Population"]]), y="Total Population", hover_name = "Town")
+
+    #st.subheader("Mean Salary by cities Distribution")
+    #st.plotly_chart(salary_box)
+    
+    st.write("Here we can see the distribution of the mean salary per hour in different towns in France. The boxplot shows the median, the first and third quartiles, and the outliers. The outliers are the towns with the highest and lowest mean salary per hour. The boxplot is a great way to visualize the distribution of the data.")
+    st.write("Interpretation : the wealthiest cities are generally cities located in Paris greater area. The salaries for these towns are so high compared to the rest of France that we cannot see the outliers for the lower salaries.")
+
+    st.subheader("Total Population Distribution")
+    
+    show_population_outliers = st.checkbox("Show outliers for Total Population", value=True)
+    
+    if show_population_outliers:
+        show_log = st.checkbox("Log scale for population", value=show_population_outliers)
+
+    else:
+        show_log = False
+
+    shared.show_figure(("population box", show_population_outliers, show_log), lambda: create_box_plot("total_population", show_population_outliers, show_log))
+    
+    st.write("Here we can see the distribution of the total population in different towns in France. The boxplot shows the median, the first and third quartiles, and the outliers. The outliers are the towns with the highest and lowest total population. The boxplot is a great way to visualize the distribution of the data.")
+    st.write("Interpretation : we can clearly see here the cities with a high population. Paris is an outlier with a very high population compared to the rest of France. The majority of the towns have a population of a few thousands of people.")
@@ -0,0 +1,56 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+import shared
+import inequality
+import profiling
+import presentation
+
+######################
+# Inequality rankings
+######################
+
+# Groups shown on the ranking chart
+RANKED_GROUPS = 25
+
+def Ranking_page():
+    st.title("Ranking of regions and departements by inequality")
+    st.write("Each region and departement is summarized by inequality metrics computed over its towns, weighted by their population:")
+    st.write("- Gini index : 0 when every town has the same mean salary, closer to 1 when the salaries are concentrated in a few towns")
+    st.write("- Theil index : 0 for equal salaries, higher when some towns earn much more than the mean")
+    st.write("- Pay gaps : how much less women (young people, workers) earn than men (old people, executives), in % of the latter")
+
+    metrics = shared.load_inequality_metrics()
+    national = metrics.national()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Gini index of France", f"{national['gini']:.3f}")
+    col2.metric("Gender pay gap", f"{national['gender_gap']:.1f} %")
+    col3.metric("Young / old pay gap", f"{national['age_gap']:.1f} %")
+    col4.metric("Worker / executive pay gap", f"{national['category_gap']:.1f} %")
+
+    col5, col6, col7 = st.columns(3)
+    with col5:
+        level = st.radio("Rank", options=["Region", "Departement"], horizontal=True)
+    with col6:
+        region = st.selectbox("Region of the departements", options=["All"] + shared.load_cube().regions, index=0, disabled=level != "Departement")
+    with col7:
+        metric = st.selectbox("Rank by", options=["gini", "theil"] + list(inequality.GAPS), format_func=inequality.METRICS.get)
+
+    with profiling.stage("ranking") as record:
+        table = metrics.table(level, None if region == "All" or level != "Departement" else region)
+        table = table.sort_values(metric, ascending=False)
+        record["rows"] = len(table)
+    names = table[inequality.LEVELS[level][-1]].str.strip()
+
+    def build_ranking():
+        """Horizontal bars of the most unequal groups, with the national value."""
+        ranked = table.head(RANKED_GROUPS)
+        fig = go.Figure(data=go.Bar(x=ranked[metric], y=names.iloc[:RANKED_GROUPS], orientation="h", hovertemplate="%{y}: %{x:.3f}<extra></extra>"))
+        fig.add_vline(x=national[metric], line_dash="dash", annotation_text="France")
+        fig.update_layout(xaxis_title=inequality.METRICS[metric], yaxis_autorange="reversed", height=max(400, 22 * len(ranked)))
+        return fig
+
+    shared.show_figure(("inequality ranking", level, region, metric), build_ranking)
+    st.write(f"The chart shows the {RANKED_GROUPS} most unequal {level.lower()}s for the selected metric; the dashed line is the value for the whole of France.")
+
+    st.dataframe(presentation.for_display(table.round(3), inequality.METRICS), hide_index=True)